@@ -0,0 +1,35 @@
+"""
+Helpers shared by the local file caches under data_cache/.
+
+Cache entries are named `<name>_<hash>.<ext>`, where the hash is taken over the
+contents of the source file(s). Replacing a source file therefore changes the
+entry name, and the superseded entry is removed once the new one is written.
+"""
+
+import hashlib
+from pathlib import Path
+from typing import Sequence, Union
+
+BASE_DIR = Path(__file__).resolve().parent
+CACHE_DIR = BASE_DIR / "data_cache"
+
+
+def file_signature(paths: Sequence[Union[str, Path]], length: int = 12) -> str:
+    """Short content hash over one or more files, used to key cache entries."""
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:length]
+
+
+def cache_path(name: str, signature: str, suffix: str = "parquet", cache_dir: Path = CACHE_DIR) -> Path:
+    return Path(cache_dir) / f"{name}_{signature}.{suffix}"
+
+
+def remove_stale(name: str, keep: Path, cache_dir: Path = CACHE_DIR, length: int = 12) -> None:
+    """Delete older cache entries for `name` once a fresh one has been written."""
+    for old in Path(cache_dir).glob(f"{name}_{'?' * length}.*"):
+        if old != keep and old.is_file():
+            old.unlink()
@@ -0,0 +1,129 @@
+"""
+Cached, pre-simplified CBSA and state geometries for choropleth maps.
+
+`prepare_geo_map_data` in Part_1_MSA_Saturation.ipynb reads tl_2024_us_cbsa.shp,
+finds mainland CBSAs from representative points, reprojects to EPSG:5070 and
+simplifies on every call. Here that work happens once per source file: the
+mainland layer is simplified at each tolerance in SIMPLIFY_TOLERANCES and written
+as GeoParquet under data_cache/ (keyed by a hash of the shapefile), and loaded
+layers are also memoized in-process. Metrics are attached by CBSAFP without
+touching the shapefile again.
+
+Usage:
+  from cbsa_geometry import attach_metrics, prepare_geo_map_data
+  merged = attach_metrics(df_lifetime_apps, ["apps_18plus_share_of_population",
+                                             "apps_18to24_share_of_population"])
+  merged = prepare_geo_map_data(df_lifetime_apps, "apps_18plus_share_of_population")
+"""
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+from cache_utils import BASE_DIR, CACHE_DIR, cache_path, file_signature, remove_stale
+from geo_cache import EQUAL_AREA_CRS, source_files
+
+CBSA_SOURCE = BASE_DIR / "data" / "tl_2024_us_cbsa" / "tl_2024_us_cbsa.shp"
+STATE_SOURCE = BASE_DIR / "data" / "tl_2024_us_state" / "tl_2024_us_state.shp"
+
+# Simplification tolerances (meters in EPSG:5070); 0 keeps full resolution
+SIMPLIFY_TOLERANCES: Tuple[int, ...] = (0, 1000, 5000)
+DEFAULT_TOLERANCE = 1000
+
+# Lon/lat box used by the notebook to keep the lower 48
+MAINLAND_LON = (-125, -66)
+MAINLAND_LAT = (24, 50)
+
+_LAYERS: Dict[str, Dict[str, object]] = {
+    "cbsa": {"source": CBSA_SOURCE, "key": "CBSAFP", "width": 5, "default_key_col": "cbsa"},
+    "state": {"source": STATE_SOURCE, "key": "STATEFP", "width": 2, "default_key_col": "statefp"},
+}
+
+
+def _build_layer(layer: str, source: Path, signature: str) -> None:
+    """Read the shapefile once and write every simplified mainland resolution."""
+    spec = _LAYERS[layer]
+    print(f"[cbsa_geometry] Building {layer} geometry cache from {source.name}...")
+    gdf = gpd.read_file(source)
+    gdf[spec["key"]] = gdf[spec["key"]].astype(str).str.zfill(spec["width"])
+
+    rep_pts = gdf.to_crs(4326).geometry.representative_point()
+    mainland_mask = rep_pts.x.between(*MAINLAND_LON) & rep_pts.y.between(*MAINLAND_LAT)
+    mainland = gdf.loc[mainland_mask].to_crs(EQUAL_AREA_CRS)
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    for tolerance in SIMPLIFY_TOLERANCES:
+        out = mainland.copy()
+        if tolerance:
+            out["geometry"] = out.geometry.simplify(tolerance=tolerance, preserve_topology=True)
+        name = f"{layer}_mainland_t{tolerance}"
+        path = cache_path(name, signature)
+        out.to_parquet(path, index=False)
+        remove_stale(name, path)
+
+
+@lru_cache(maxsize=None)
+def _load_cached(layer: str, source: str, file_stats: Tuple[Tuple[str, int, int], ...],
+                 tolerance: int) -> gpd.GeoDataFrame:
+    # (path, mtime, size) of every shapefile part is part of the memo key, so replacing
+    # any of them (e.g. just the .dbf) is re-hashed, matching the on-disk cache key
+    source_path = Path(source)
+    signature = file_signature(source_files(source_path))
+    path = cache_path(f"{layer}_mainland_t{tolerance}", signature)
+    if not path.exists():
+        _build_layer(layer, source_path, signature)
+    return gpd.read_parquet(path)
+
+
+def load_geometries(layer: str = "cbsa", tolerance: int = DEFAULT_TOLERANCE,
+                    source: Union[str, Path, None] = None) -> gpd.GeoDataFrame:
+    """
+    Mainland, EPSG:5070, simplified geometries for `layer` ("cbsa" or "state").
+
+    Returns a copy, so callers can add columns without touching the memoized layer.
+    """
+    if layer not in _LAYERS:
+        raise ValueError(f"Unsupported layer: {layer} (expected one of {sorted(_LAYERS)})")
+    if tolerance not in SIMPLIFY_TOLERANCES:
+        raise ValueError(f"tolerance must be one of {SIMPLIFY_TOLERANCES}")
+    source = Path(source or _LAYERS[layer]["source"])
+    source.stat()  # fail fast (FileNotFoundError) on a missing shapefile
+    file_stats = tuple((str(f), f.stat().st_mtime_ns, f.stat().st_size) for f in source_files(source))
+    return _load_cached(layer, str(source), file_stats, tolerance).copy()
+
+
+def attach_metrics(df: pd.DataFrame, metrics: Union[str, Sequence[str]], *, layer: str = "cbsa",
+                   tolerance: int = DEFAULT_TOLERANCE, key_col: Optional[str] = None,
+                   fill_for_render: bool = True) -> gpd.GeoDataFrame:
+    """
+    Merge any number of metric columns onto the cached geometries.
+
+    df is joined on key_col (zero-padded to the layer's code width) against CBSAFP /
+    STATEFP; key_col defaults to "cbsa" for the CBSA layer and "statefp" for the
+    state layer. With fill_for_render, missing values become 0 and non-positive
+    values a tiny epsilon, as in the notebook, so every polygon renders.
+    """
+    metrics = [metrics] if isinstance(metrics, str) else list(metrics)
+    geoms = load_geometries(layer, tolerance)
+    spec = _LAYERS[layer]
+    key_col = key_col or spec["default_key_col"]
+
+    values = df[[key_col] + metrics].copy()
+    values[key_col] = values[key_col].astype(str).str.zfill(spec["width"])
+    merged = geoms.merge(values, left_on=spec["key"], right_on=key_col, how="left")
+
+    if fill_for_render:
+        epsilon = 1e-6
+        for metric in metrics:
+            merged[metric] = merged[metric].fillna(0)
+            merged[metric] = np.where(merged[metric] > 0, merged[metric], epsilon)
+    return merged
+
+
+def prepare_geo_map_data(df: pd.DataFrame, metric: str) -> gpd.GeoDataFrame:
+    """Drop-in replacement for the notebook helper, backed by the geometry cache."""
+    return attach_metrics(df, [metric])
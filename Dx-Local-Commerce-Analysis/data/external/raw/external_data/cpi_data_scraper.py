@@ -16,8 +16,6 @@ Target: Monthly CPI data by state from January 2023 onwards
 
 import os
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
 import numpy as np
 from datetime import datetime, timedelta
 import json
@@ -28,6 +26,8 @@ warnings.filterwarnings('ignore')
 
 class CPIDataScraper:
     def __init__(self):
+        # Imported here so the dataset builders and create_cpi_time_series work without requests/bs4
+        import requests
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
@@ -302,6 +302,9 @@ class CPIDataScraper:
     
     def scrape_state_cpi_websites(self):
         """Scrape state government websites for CPI data"""
+        # Outside the per-state try below, so a missing bs4 is reported rather than skipped
+        from bs4 import BeautifulSoup
+
         print("🔍 Scraping state government CPI data...")
         
         # Some states publish their own CPI data
@@ -7,8 +7,6 @@ that were successfully scraped but not properly parsed.
 """
 
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
 import numpy as np
 from datetime import datetime
 import warnings
@@ -18,6 +16,9 @@ def scrape_and_process_dol_historical():
     """Scrape and properly process DOL historical minimum wage data"""
     print("🔍 Enhanced DOL Historical Data Processing...")
     
+    # Imported here so the table processors work without requests
+    import requests
+
     url = 'https://www.dol.gov/agencies/whd/state/minimum-wage/history'
     
     try:
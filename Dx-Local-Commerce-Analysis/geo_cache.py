@@ -0,0 +1,70 @@
+"""
+On-disk cache for projected Census geometry layers.
+
+Reading the national TIGER / cartographic-boundary shapefiles and reprojecting them
+is the slow part of every geospatial notebook here. `load_layer` does it once per
+source file: the projected layer is written as GeoParquet under data_cache/, named
+after a hash of the source file, and later calls read the parquet instead. Zip
+archives are read in place, so nothing is unzipped.
+
+Usage:
+  from geo_cache import load_layer
+  zctas = load_layer("data_tiger/cb_2020_us_zcta520_500k.zip", name="zcta520")
+"""
+
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+
+import geopandas as gpd
+
+from cache_utils import BASE_DIR, CACHE_DIR, cache_path, file_signature, remove_stale
+
+# CONUS Albers equal-area; areas and area shares are computed in this CRS
+EQUAL_AREA_CRS = 5070
+
+# Sidecar files that change together with a shapefile's geometry or attributes
+_SHAPEFILE_PARTS = (".shp", ".dbf", ".shx", ".prj")
+
+
+def source_files(source: Path) -> List[Path]:
+    """Files whose contents define the layer (the zip itself, or the shapefile parts)."""
+    if source.suffix.lower() == ".zip":
+        return [source]
+    return [source.with_suffix(ext) for ext in _SHAPEFILE_PARTS if source.with_suffix(ext).exists()]
+
+
+def load_layer(source: Union[str, Path], *, name: Optional[str] = None, crs: Optional[int] = EQUAL_AREA_CRS,
+               columns: Optional[Sequence[str]] = None, cache_dir: Path = CACHE_DIR,
+               refresh: bool = False) -> gpd.GeoDataFrame:
+    """
+    Load a shapefile (or zipped shapefile) projected to `crs`, via the GeoParquet cache.
+
+    The cache entry is keyed by a hash of the source file(s), so replacing the
+    shapefile invalidates it automatically. `columns` limits the attributes kept.
+    """
+    source = Path(source)
+    if not source.is_absolute():
+        source = BASE_DIR / source
+    files = source_files(source)
+    if not files:
+        raise FileNotFoundError(f"Geometry source not found: {source}")
+
+    name = name or source.stem
+    crs_tag = f"epsg{crs}" if crs else "native"
+    key = f"{name}_{crs_tag}"
+    cached = cache_path(key, file_signature(files), cache_dir=cache_dir)
+    if cached.exists() and not refresh:
+        return gpd.read_parquet(cached, columns=list(columns) + ["geometry"] if columns else None)
+
+    read_path = f"zip://{source}" if source.suffix.lower() == ".zip" else str(source)
+    print(f"[geo_cache] Building {cached.name} from {source.name}...")
+    gdf = gpd.read_file(read_path)
+    if crs:
+        gdf = gdf.to_crs(crs)
+
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    gdf.to_parquet(cached, index=False)
+    remove_stale(key, cached, cache_dir)
+    if columns:
+        gdf = gdf[list(columns) + ["geometry"]]
+    return gdf
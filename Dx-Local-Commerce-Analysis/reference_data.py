@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Registry of external reference files with a typed columnar cache.
+
+data_prep.ipynb re-parses the HUD ZIP crosswalk workbooks with pd.read_excel and
+re-filters the Census CBSA population file on every run. Each file is declared
+once in REFERENCE_FILES with its key columns (zero-padded string codes) and its
+standard filters. The first load parses the source, applies the filters and
+writes an uncompressed Arrow/Feather file under data_cache/; later loads are
+memory-mapped reads of that file. The cache entry is keyed by a hash of the
+source file and of its registry entry, so editing either rebuilds it.
+
+Usage:
+  from reference_data import load_reference
+  df_zipcode_cbsa = load_reference("zip_cbsa")
+  df_us_population_310_2024 = load_reference("cbsa_population_2024")
+
+  python reference_data.py        # warm the cache for every registered file
+"""
+
+import hashlib
+import json
+from typing import Dict, List
+
+import pandas as pd
+import pyarrow.feather as feather
+
+from cache_utils import BASE_DIR, cache_path, file_signature, remove_stale
+
+# Each entry: path (relative to this directory), reader ("excel" or "csv"),
+# pad (column -> zero-padded width, stored as string), and optionally
+# lowercase (lowercase column names), filters (column -> required value),
+# columns (columns to keep, after lowercasing).
+REFERENCE_FILES: Dict[str, Dict] = {
+    "zip_cbsa": {
+        "path": "data/external/raw/ZIP_CBSA_062025.xlsx",
+        "reader": "excel",
+        "pad": {"ZIP": 5, "CBSA": 5},
+    },
+    "zip_county": {
+        "path": "data/archive/ZIP_COUNTY_062025.xlsx",
+        "reader": "excel",
+        "pad": {"ZIP": 5, "COUNTY": 5},
+    },
+    "cbsa_population_2024": {
+        "path": "data/external/raw/cbsa-est2024-agesex.csv",
+        "reader": "csv",
+        "lowercase": True,
+        # sumlev 310 = metro/micro areas (matches the internal MSA list); year 6 = 2024 estimates
+        "filters": {"sumlev": 310, "year": 6},
+        "columns": ["sumlev", "cbsa", "mdiv", "name", "lsad", "year", "age18plus_tot",
+                    "age1824_tot", "age2544_tot", "age4564_tot", "age65plus_tot"],
+        "pad": {"cbsa": 5},
+    },
+}
+
+
+def _zero_pad(s: pd.Series, width: int) -> pd.Series:
+    """Codes as zero-padded strings; numeric columns go through Int64 so 10180.0 -> '10180'."""
+    if pd.api.types.is_numeric_dtype(s):
+        s = s.astype("Int64")
+    return s.astype("string").str.strip().str.zfill(width)
+
+
+def _as_code_columns(df: pd.DataFrame, spec: Dict) -> pd.DataFrame:
+    """
+    Padded code columns as object dtype with None for missing.
+
+    Applied to both fresh and cached loads: Arrow hands strings back as pandas'
+    string dtype, so without this the first call and later calls would differ.
+    """
+    for col in spec.get("pad", {}):
+        values = df[col].astype("string")
+        df[col] = values.astype(object).where(values.notna(), None)
+    return df
+
+
+def _read_source(spec: Dict) -> pd.DataFrame:
+    path = BASE_DIR / spec["path"]
+    # Read key columns as text so leading zeros in the source survive
+    text_cols = {col: str for col in spec.get("pad", {})}
+    if spec["reader"] == "excel":
+        df = pd.read_excel(path, dtype=text_cols)
+    elif spec["reader"] == "csv":
+        df = pd.read_csv(path, encoding="utf-8-sig", low_memory=False)
+    else:
+        raise ValueError(f"Unsupported reader: {spec['reader']}")
+
+    if spec.get("lowercase"):
+        df.columns = df.columns.str.lower()
+    for col, value in spec.get("filters", {}).items():
+        df = df[df[col] == value]
+    if spec.get("columns"):
+        df = df[spec["columns"]]
+    for col, width in spec.get("pad", {}).items():
+        df[col] = _zero_pad(df[col], width)
+    return _as_code_columns(df.reset_index(drop=True), spec)
+
+
+def _signature(name: str, spec: Dict) -> str:
+    source_sig = file_signature([BASE_DIR / spec["path"]])
+    spec_sig = json.dumps(spec, sort_keys=True)
+    return hashlib.sha1(f"{name}|{source_sig}|{spec_sig}".encode()).hexdigest()[:12]
+
+
+def load_reference(name: str, refresh: bool = False) -> pd.DataFrame:
+    """Load a registered reference file, building its columnar cache on first use."""
+    if name not in REFERENCE_FILES:
+        raise KeyError(f"Unknown reference file: {name} (registered: {sorted(REFERENCE_FILES)})")
+    spec = REFERENCE_FILES[name]
+    cache_name = f"ref_{name}"
+    cached = cache_path(cache_name, _signature(name, spec), suffix="feather")
+
+    if cached.exists() and not refresh:
+        return _as_code_columns(feather.read_table(cached, memory_map=True).to_pandas(), spec)
+
+    print(f"[reference_data] Building cache for {name} from {spec['path']}...")
+    df = _read_source(spec)
+    cached.parent.mkdir(parents=True, exist_ok=True)
+    feather.write_feather(df, cached, compression="uncompressed")
+    remove_stale(cache_name, cached)
+    return df
+
+
+def main():
+    rows: List[Dict] = []
+    for name in REFERENCE_FILES:
+        df = load_reference(name)
+        rows.append({"name": name, "rows": len(df), "columns": len(df.columns)})
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
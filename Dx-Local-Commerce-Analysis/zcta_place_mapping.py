@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+ZCTA -> Census place assignment with a spatial index and cached geometries.
+
+Replaces the per-city loop in generate_core_zipcodes_geospatial.ipynb. Instead of
+testing every ZCTA centroid against each of the top-100 cities, the mapping is
+built once for every place in the country:
+
+- ZCTA and place layers are loaded through geo_cache (projected to EPSG:5070 and
+  stored as GeoParquet, no re-unzipping)
+- an STRtree over ZCTA polygons finds candidate ZCTAs for each place
+- prepared place geometries are used for the centroid-within and area-share tests
+- work is partitioned by place STATEFP and spread across worker processes
+
+The resulting long mapping (one row per intersecting ZCTA/place pair, with area
+shares and a centroid flag) is persisted as GeoParquet keyed by both source files,
+so the city lists can be rebuilt from it in seconds.
+
+Usage:
+  python zcta_place_mapping.py            # rebuild top_100_cities_core_zipcodes*.csv
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from cache_utils import BASE_DIR, CACHE_DIR, cache_path, file_signature, remove_stale
+from geo_cache import load_layer, source_files
+
+DATA_DIR = BASE_DIR / "data_tiger"
+PLACE_SOURCE = DATA_DIR / "cb_2023_us_place_500k.zip"
+ZCTA_SOURCE = DATA_DIR / "cb_2020_us_zcta520_500k.zip"
+
+STATE_ABBR_TO_FIPS: Dict[str, str] = {
+    'AL': '01', 'AK': '02', 'AZ': '04', 'AR': '05', 'CA': '06', 'CO': '08', 'CT': '09', 'DE': '10',
+    'DC': '11', 'FL': '12', 'GA': '13', 'HI': '15', 'ID': '16', 'IL': '17', 'IN': '18', 'IA': '19',
+    'KS': '20', 'KY': '21', 'LA': '22', 'ME': '23', 'MD': '24', 'MA': '25', 'MI': '26', 'MN': '27',
+    'MS': '28', 'MO': '29', 'MT': '30', 'NE': '31', 'NV': '32', 'NH': '33', 'NJ': '34', 'NM': '35',
+    'NY': '36', 'NC': '37', 'ND': '38', 'OH': '39', 'OK': '40', 'OR': '41', 'PA': '42', 'RI': '44',
+    'SC': '45', 'SD': '46', 'TN': '47', 'TX': '48', 'UT': '49', 'VT': '50', 'VA': '51', 'WA': '53',
+    'WV': '54', 'WI': '55', 'WY': '56',
+}
+
+
+def _resolve_source(path: Path) -> Path:
+    """Prefer the zip archive; fall back to an already-extracted .shp next to it."""
+    if path.exists():
+        return path
+    shp = path.with_suffix(".shp")
+    if shp.exists():
+        return shp
+    raise FileNotFoundError(f"Neither {path.name} nor {shp.name} found in {path.parent}")
+
+
+def load_zctas(source: Path = ZCTA_SOURCE) -> gpd.GeoDataFrame:
+    zctas = load_layer(_resolve_source(source), name="zcta520")
+    # ZCTA code column is ZCTA5CE20 in the 2020 files, ZCTA5CE10 in older vintages
+    code_col = next((c for c in ("ZCTA5CE20", "ZCTA5CE10") if c in zctas.columns), None)
+    if code_col is None:
+        raise RuntimeError(f"ZCTA code column not found. Columns: {list(zctas.columns)}")
+    return gpd.GeoDataFrame({"ZCTA5": zctas[code_col].astype(str).str.zfill(5)},
+                            geometry=zctas.geometry.values, crs=zctas.crs)
+
+
+def load_places(source: Path = PLACE_SOURCE) -> gpd.GeoDataFrame:
+    places = load_layer(_resolve_source(source), name="place")
+    return gpd.GeoDataFrame({"PLACE_GEOID": places["GEOID"].astype(str),
+                             "PLACE_NAME": places["NAME"],
+                             "STATEFP": places["STATEFP"].astype(str).str.zfill(2)},
+                            geometry=places.geometry.values, crs=places.crs)
+
+
+def match_state(place_geoms: np.ndarray, zcta_geoms: np.ndarray) -> pd.DataFrame:
+    """
+    All intersecting (ZCTA, place) pairs within one state partition.
+
+    Returns positional indices into the inputs plus the area shares and the
+    centroid-within flag used by the original notebook.
+    """
+    tree = shapely.STRtree(zcta_geoms)
+    place_idx, zcta_idx = tree.query(place_geoms, predicate="intersects")
+    if len(place_idx) == 0:
+        return pd.DataFrame(columns=["place_idx", "zcta_idx", "zcta_area_share",
+                                     "place_area_share", "centroid_within"])
+
+    shapely.prepare(place_geoms)
+    pairs_place = place_geoms[place_idx]
+    pairs_zcta = zcta_geoms[zcta_idx]
+
+    centroids = shapely.centroid(zcta_geoms)
+    within = shapely.contains_xy(pairs_place, shapely.get_x(centroids[zcta_idx]),
+                                 shapely.get_y(centroids[zcta_idx]))
+    # Fully covered ZCTAs skip the (expensive) polygon intersection
+    covered = shapely.covers(pairs_place, pairs_zcta)
+    inter_area = shapely.area(pairs_zcta).copy()
+    partial = ~covered
+    inter_area[partial] = shapely.area(shapely.intersection(pairs_zcta[partial], pairs_place[partial]))
+
+    return pd.DataFrame({
+        "place_idx": place_idx,
+        "zcta_idx": zcta_idx,
+        "zcta_area_share": inter_area / shapely.area(pairs_zcta),
+        "place_area_share": inter_area / shapely.area(pairs_place),
+        "centroid_within": within,
+    })
+
+
+def _match_state_task(task: Dict) -> pd.DataFrame:
+    pairs = match_state(task["place_geoms"], task["zcta_geoms"])
+    pairs["place_idx"] = task["place_ids"][pairs["place_idx"].to_numpy(dtype=int)]
+    pairs["zcta_idx"] = task["zcta_ids"][pairs["zcta_idx"].to_numpy(dtype=int)]
+    return pairs
+
+
+def build_mapping(places: gpd.GeoDataFrame, zctas: gpd.GeoDataFrame, *,
+                  statefps: Optional[Sequence[str]] = None, n_jobs: int = 4) -> gpd.GeoDataFrame:
+    """
+    Intersect every place with the ZCTAs, partitioned by place STATEFP.
+
+    The national ZCTA STRtree is only used to cut each state's candidate ZCTAs by
+    bounding box; the per-state work (its own STRtree with the exact intersects
+    test, prepared places, area shares) runs on a process pool when n_jobs > 1.
+    """
+    if statefps is not None:
+        places = places[places["STATEFP"].isin(statefps)]
+    place_geoms = np.asarray(places.geometry.values)
+    zcta_geoms = np.asarray(zctas.geometry.values)
+    national_tree = shapely.STRtree(zcta_geoms)
+
+    tasks = []
+    for statefp, idx in places.groupby("STATEFP").indices.items():
+        state_places = place_geoms[idx]
+        # Bounding-box candidates only; the exact intersects test runs once, in match_state
+        candidates = np.unique(national_tree.query(state_places)[1])
+        if len(candidates) == 0:
+            continue
+        tasks.append({"place_geoms": state_places, "place_ids": idx,
+                      "zcta_geoms": zcta_geoms[candidates], "zcta_ids": candidates})
+
+    if n_jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            results = list(pool.map(_match_state_task, tasks))
+    else:
+        results = [_match_state_task(t) for t in tasks]
+
+    pairs = pd.concat(results, ignore_index=True) if results else pd.DataFrame(
+        columns=["place_idx", "zcta_idx", "zcta_area_share", "place_area_share", "centroid_within"])
+    place_attrs = places.iloc[pairs["place_idx"].to_numpy(dtype=int)]
+    zcta_rows = zctas.iloc[pairs["zcta_idx"].to_numpy(dtype=int)]
+
+    mapping = gpd.GeoDataFrame({
+        "ZCTA5": zcta_rows["ZCTA5"].to_numpy(),
+        "PLACE_GEOID": place_attrs["PLACE_GEOID"].to_numpy(),
+        "PLACE_NAME": place_attrs["PLACE_NAME"].to_numpy(),
+        "STATEFP": place_attrs["STATEFP"].to_numpy(),
+        "zcta_area_share": pairs["zcta_area_share"].to_numpy(dtype=float),
+        "place_area_share": pairs["place_area_share"].to_numpy(dtype=float),
+        "centroid_within": pairs["centroid_within"].to_numpy(dtype=bool),
+    }, geometry=zcta_rows.geometry.centroid.values, crs=zctas.crs)
+    return mapping.sort_values(["STATEFP", "PLACE_GEOID", "ZCTA5"]).reset_index(drop=True)
+
+
+def load_mapping(place_source: Path = PLACE_SOURCE, zcta_source: Path = ZCTA_SOURCE, *,
+                 n_jobs: int = 4, refresh: bool = False) -> gpd.GeoDataFrame:
+    """ZCTA <-> place mapping for all places, cached as GeoParquet keyed by both source files."""
+    place_source, zcta_source = _resolve_source(place_source), _resolve_source(zcta_source)
+    signature = file_signature(source_files(place_source) + source_files(zcta_source))
+    cached = cache_path("zcta_place_mapping", signature)
+    if cached.exists() and not refresh:
+        return gpd.read_parquet(cached)
+
+    mapping = build_mapping(load_places(place_source), load_zctas(zcta_source), n_jobs=n_jobs)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    mapping.to_parquet(cached, index=False)
+    remove_stale("zcta_place_mapping", cached)
+    print(f"[zcta_place_mapping] Wrote {len(mapping):,} ZCTA/place pairs to {cached.name}")
+    return mapping
+
+
+def _normalize_name(s: pd.Series) -> pd.Series:
+    return s.str.upper().str.replace(".", "", regex=False).str.strip()
+
+
+def core_zipcodes(cities: pd.DataFrame, mapping: pd.DataFrame, *, rule: str = "centroid",
+                  min_share: float = 0.5) -> pd.DataFrame:
+    """
+    Comma-separated core ZIP codes per city, in the top_100_cities_core_zipcodes.csv layout.
+
+    rule="centroid" keeps ZCTAs whose centroid falls inside the place (the notebook's
+    definition); rule="area_share" keeps ZCTAs with at least min_share of their area inside.
+    Places are matched on normalized name (with ST/SAINT variants) and state, falling
+    back to a name-contains match like the notebook.
+    """
+    if rule == "centroid":
+        core = mapping[mapping["centroid_within"]]
+    elif rule == "area_share":
+        core = mapping[mapping["zcta_area_share"] >= min_share]
+    else:
+        raise ValueError("rule must be 'centroid' or 'area_share'")
+    core = pd.DataFrame(core.drop(columns="geometry", errors="ignore"))
+    core["NAME_NORM"] = _normalize_name(core["PLACE_NAME"])
+    zips_by_place = core.groupby(["STATEFP", "NAME_NORM"])["ZCTA5"].agg(lambda z: sorted(set(z)))
+
+    names = mapping[["STATEFP", "PLACE_NAME"]].drop_duplicates()
+    names = names.assign(NAME_NORM=_normalize_name(names["PLACE_NAME"]))
+    names_by_state = names.groupby("STATEFP")["NAME_NORM"].agg(set).to_dict()
+
+    out = cities.copy()
+    zipcodes: List[str] = []
+    for city, state in zip(_normalize_name(out["CITY"]), out["STATE"].str.upper().str.strip()):
+        statefp = STATE_ABBR_TO_FIPS.get(state)
+        state_names = names_by_state.get(statefp, set())
+        variants = {city, city.replace("ST ", "SAINT "), city.replace("SAINT ", "ST ")}
+        matched = variants & state_names or {n for n in state_names if city in n}
+        zips = sorted({z for n in matched for z in zips_by_place.get((statefp, n), [])})
+        zipcodes.append(",".join(zips))
+    out["ZIPCODES"] = zipcodes
+    return out
+
+
+def main():
+    mapping = load_mapping()
+    cities = pd.read_csv(BASE_DIR / "top_100_cities.csv")
+    output = core_zipcodes(cities, mapping)[["CITY_STATE", "CITY", "STATE", "POPULATION", "CITY_RANK", "ZIPCODES"]]
+    output.to_csv(BASE_DIR / "top_100_cities_core_zipcodes.csv", index=False)
+    print("Wrote top_100_cities_core_zipcodes.csv")
+
+    long_df = output.assign(ZIPCODE=output["ZIPCODES"].str.split(",")).explode("ZIPCODE")
+    long_df = long_df[long_df["ZIPCODE"].fillna("") != ""]
+    long_df = long_df[["CITY_STATE", "CITY", "STATE", "POPULATION", "CITY_RANK", "ZIPCODE"]]
+    long_df.to_csv(BASE_DIR / "top_100_cities_core_zipcodes_long.csv", index=False)
+    print("Wrote top_100_cities_core_zipcodes_long.csv rows:", len(long_df))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,13 +6,14 @@ sys.path.append('../../utils')
 
 import pandas as pd
 import numpy as np
-from snowflake_connection import SnowflakeHook
 
 def main():
     print("NEW DX: FIRST DASH vs NON-FIRST DASH COMPARISON")
     print("="*70)
     
     # Initialize Snowflake connection
+    # Imported here so --shift-level --from-csv runs without the Snowflake packages
+    from snowflake_connection import SnowflakeHook
     snowhook = SnowflakeHook()
     
     # Read the summary analysis query
@@ -181,4 +182,9 @@ def main():
         print("Insufficient data to compare first dash vs non-first dash within new DX.")
 
 if __name__ == "__main__":
-    main()
+    if '--shift-level' in sys.argv:
+        # Stream shift-level rows and report differences with 95% CIs
+        import shift_level_stats
+        shift_level_stats.main()
+    else:
+        main()
@@ -6,7 +6,6 @@ sys.path.append('../../utils')
 
 import pandas as pd
 import numpy as np
-from snowflake_connection import SnowflakeHook
 
 def main():
     print("New DX Assignment Analysis")
@@ -14,6 +13,8 @@ def main():
     
     # Initialize Snowflake connection
     print("Connecting to Snowflake...")
+    # Imported here so --shift-level --from-csv runs without the Snowflake packages
+    from snowflake_connection import SnowflakeHook
     snowhook = SnowflakeHook()
     
     # Read the summary analysis query
@@ -142,4 +143,9 @@ def main():
     return summary_df
 
 if __name__ == "__main__":
-    results = main()
+    if '--shift-level' in sys.argv:
+        # Stream shift-level rows and report differences with 95% CIs
+        import shift_level_stats
+        shift_level_stats.main()
+    else:
+        results = main()
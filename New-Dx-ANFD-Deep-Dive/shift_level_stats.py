@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Shift-level streaming mode with confidence intervals for the new DX comparison.
+
+run_analysis.py and first_dash_comparison.py read the four pre-aggregated rows of
+new_dx_summary_single_statement.sql and judge differences against fixed thresholds.
+This module reads the shift-level rows behind that summary (sql/new_dx_shift_level.sql)
+in chunks and keeps, per (new_dx_l7d, is_first_dash) segment, only mergeable
+sufficient statistics:
+
+- distinct shift counts, row counts, sums and sums of squares of every metric
+  (analytic normal CIs)
+- Poisson-bootstrap replicate sums (bootstrap CIs for means and differences)
+- an exact per-minute histogram of minutes_to_first_assignment (median / p90 and
+  their bootstrap CIs)
+- a k-minimum-values sketch of dasher_id (approximate distinct dashers)
+
+Memory is bounded by the number of segments, not the number of shifts. Distinct
+shifts are counted per chunk, so all rows of a shift_id must arrive in the same
+chunk (stream_from_snowflake buckets by shift_id; a CSV should be sorted by it).
+
+Usage:
+  python shift_level_stats.py                      # stream from Snowflake
+  python shift_level_stats.py --from-csv shifts.csv
+"""
+
+import sys
+import os
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+Segment = Tuple[str, bool]
+
+SHIFT_LEVEL_SQL = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sql', 'new_dx_shift_level.sql')
+# Prefix of the scratch table each streaming run materializes (suffixed per run, dropped afterwards)
+SHIFT_LEVEL_TABLE_PREFIX = 'proddb.static.tbl_new_dx_shift_level'
+
+# Mean-type metrics of the comparison table: name -> (source column, is_indicator)
+MEAN_METRICS: Dict[str, Tuple[str, bool]] = {
+    'pct_shifts_with_assignments': ('num_assigns', True),
+    'avg_assignments_per_shift': ('num_assigns', False),
+    'pct_shifts_with_accepts': ('num_accepts', True),
+    'avg_accepts_per_shift': ('num_accepts', False),
+    'avg_acceptance_rate': ('ar', False),
+    'pct_shifts_with_deliveries': ('num_deliveries', True),
+    'avg_deliveries_per_shift': ('num_deliveries', False),
+    'avg_delivery_completion_rate': ('delivery_rate', False),
+    'avg_minutes_to_first_assignment': ('minutes_to_first_assignment', False),
+    'avg_shift_hours': ('shift_hours', False),
+}
+QUANTILE_METRICS: Dict[str, float] = {
+    'median_minutes_to_first_assignment': 0.5,
+    'p90_minutes_to_first_assignment': 0.9,
+}
+
+# Histogram range for minutes_to_first_assignment; values outside are clipped to the edges
+MINUTES_RANGE = (-60, 24 * 60)
+
+SEGMENT_LABELS: Dict[Segment, str] = {
+    ('Y', True): 'New DX (First Dash)',
+    ('Y', False): 'New DX (Not First Dash)',
+    ('N', True): 'Existing DX (First Dash)',
+    ('N', False): 'Existing DX (Not First Dash)',
+}
+
+Z_95 = 1.959963984540054
+
+
+def metric_matrix(chunk: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-row metric values (NaN -> 0) and a denominator mask, one column per MEAN_METRICS entry.
+
+    Indicators follow the SQL `div0(sum(case when x > 0 then 1 else 0 end),
+    count(distinct shift_id))`: every row adds to the numerator, but only the first
+    row of each shift_id counts in the denominator. Plain averages skip nulls like `avg()`.
+    """
+    values = np.empty((len(chunk), len(MEAN_METRICS)))
+    mask = np.empty_like(values)
+    first_of_shift = ~chunk['shift_id'].duplicated().to_numpy()
+    for j, (column, is_indicator) in enumerate(MEAN_METRICS.values()):
+        raw = pd.to_numeric(chunk[column], errors='coerce').to_numpy(dtype=float)
+        if is_indicator:
+            values[:, j] = (raw > 0).astype(float)
+            mask[:, j] = first_of_shift
+        else:
+            notnull = ~np.isnan(raw)
+            values[:, j] = np.where(notnull, raw, 0.0)
+            mask[:, j] = notnull
+    return values, mask
+
+
+class DistinctSketch:
+    """K-minimum-values distinct counter; exact below k distinct values, mergeable."""
+
+    def __init__(self, k: int = 4096):
+        self.k = k
+        self.mins = np.empty(0, dtype=np.uint64)
+
+    def update(self, values: pd.Series) -> None:
+        hashes = pd.util.hash_array(values.astype(str).to_numpy(dtype=object))
+        self.mins = np.unique(np.concatenate([self.mins, hashes]))[:self.k]
+
+    def merge(self, other: 'DistinctSketch') -> None:
+        self.mins = np.unique(np.concatenate([self.mins, other.mins]))[:self.k]
+
+    def estimate(self) -> float:
+        if len(self.mins) < self.k:
+            return float(len(self.mins))
+        return (self.k - 1) / (float(self.mins[-1]) / 2.0 ** 64)
+
+
+class SegmentStats:
+    """Mergeable sufficient statistics for one segment."""
+
+    def __init__(self, n_boot: int = 200):
+        m = len(MEAN_METRICS)
+        self.n_boot = n_boot
+        self.n_shifts = 0
+        self.count = np.zeros(m)
+        self.total = np.zeros(m)
+        self.total_sq = np.zeros(m)
+        self.boot_total = np.zeros((n_boot, m))
+        self.boot_count = np.zeros((n_boot, m))
+        self.minutes_hist = np.zeros(MINUTES_RANGE[1] - MINUTES_RANGE[0] + 1, dtype=np.int64)
+        self.dashers = DistinctSketch()
+
+    def update(self, chunk: pd.DataFrame, rng: np.random.Generator, block_rows: int = 20_000) -> None:
+        values, mask = metric_matrix(chunk)
+        self.n_shifts += chunk['shift_id'].nunique()
+        self.count += mask.sum(axis=0)
+        self.total += values.sum(axis=0)
+        self.total_sq += np.square(values).sum(axis=0)
+
+        # Poisson bootstrap: every row gets an independent Poisson(1) weight per replicate
+        for start in range(0, len(values), block_rows):
+            block = slice(start, start + block_rows)
+            weights = rng.poisson(1.0, size=(self.n_boot, len(values[block]))).astype(float)
+            self.boot_total += weights @ values[block]
+            self.boot_count += weights @ mask[block]
+
+        minutes = pd.to_numeric(chunk['minutes_to_first_assignment'], errors='coerce').dropna()
+        bins = np.clip(np.round(minutes.to_numpy()).astype(int), *MINUTES_RANGE) - MINUTES_RANGE[0]
+        self.minutes_hist += np.bincount(bins, minlength=len(self.minutes_hist))
+        self.dashers.update(chunk['dasher_id'])
+
+    def merge(self, other: 'SegmentStats') -> None:
+        self.n_shifts += other.n_shifts
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.boot_total += other.boot_total
+        self.boot_count += other.boot_count
+        self.minutes_hist += other.minutes_hist
+        self.dashers.merge(other.dashers)
+
+    def means(self) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.total / self.count
+
+    def standard_errors(self) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self.means()
+            var = (self.total_sq - self.count * mean ** 2) / (self.count - 1)
+            return np.sqrt(np.maximum(var, 0) / self.count)
+
+    def boot_means(self) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.boot_total / self.boot_count
+
+    def quantiles(self, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+        """Point quantiles and (n_boot, n_quantiles) multinomial-bootstrap replicates."""
+        qs = np.array(list(QUANTILE_METRICS.values()))
+        n = int(self.minutes_hist.sum())
+        if n == 0:
+            return np.full(len(qs), np.nan), np.full((self.n_boot, len(qs)), np.nan)
+        minutes = np.arange(MINUTES_RANGE[0], MINUTES_RANGE[1] + 1)
+        point = minutes[np.searchsorted(np.cumsum(self.minutes_hist), qs * n)]
+        reps = rng.multinomial(n, self.minutes_hist / n, size=self.n_boot)
+        cdf = np.cumsum(reps, axis=1)
+        idx = np.stack([(cdf < q * n).sum(axis=1) for q in qs], axis=1)
+        return point.astype(float), minutes[np.minimum(idx, len(minutes) - 1)].astype(float)
+
+
+def segment_key(new_dx_l7d, is_first_dash) -> Segment:
+    first = is_first_dash if isinstance(is_first_dash, (bool, np.bool_)) \
+        else str(is_first_dash).strip().lower() in ('true', '1', 't', 'y')
+    return str(new_dx_l7d).strip().upper(), bool(first)
+
+
+def accumulate(chunks: Iterable[pd.DataFrame], n_boot: int = 200,
+               seed: int = 42) -> Dict[Segment, SegmentStats]:
+    """
+    Fold shift-level chunks into per-segment statistics.
+
+    All rows of a shift_id must be in the same chunk, since distinct shifts are counted per chunk.
+    """
+    rng = np.random.default_rng(seed)
+    stats: Dict[Segment, SegmentStats] = {}
+    for chunk in chunks:
+        chunk.columns = chunk.columns.str.lower()
+        for (new_dx, first), rows in chunk.groupby(['new_dx_l7d', 'is_first_dash'], sort=False):
+            key = segment_key(new_dx, first)
+            stats.setdefault(key, SegmentStats(n_boot)).update(rows, rng)
+    return stats
+
+
+def segment_summary(stats: Dict[Segment, SegmentStats], seed: int = 42) -> pd.DataFrame:
+    """One row per segment and metric with the value, analytic CI and bootstrap CI."""
+    rng = np.random.default_rng(seed)
+    rows: List[Dict] = []
+    for key in sorted(stats):
+        s = stats[key]
+        base = {'new_dx_l7d': key[0], 'is_first_dash': key[1], 'dx_type': SEGMENT_LABELS.get(key, str(key)),
+                'total_shifts': s.n_shifts, 'approx_total_dashers': round(s.dashers.estimate())}
+        means, ses, boot = s.means(), s.standard_errors(), s.boot_means()
+        for j, metric in enumerate(MEAN_METRICS):
+            lo, hi = np.nanpercentile(boot[:, j], [2.5, 97.5])
+            rows.append({**base, 'metric': metric, 'value': means[j],
+                         'ci_low': means[j] - Z_95 * ses[j], 'ci_high': means[j] + Z_95 * ses[j],
+                         'boot_ci_low': lo, 'boot_ci_high': hi})
+        point, reps = s.quantiles(rng)
+        for j, metric in enumerate(QUANTILE_METRICS):
+            lo, hi = np.nanpercentile(reps[:, j], [2.5, 97.5])
+            rows.append({**base, 'metric': metric, 'value': point[j], 'ci_low': np.nan, 'ci_high': np.nan,
+                         'boot_ci_low': lo, 'boot_ci_high': hi})
+    return pd.DataFrame(rows)
+
+
+def compare_segments(stats: Dict[Segment, SegmentStats], a: Segment, b: Segment,
+                     seed: int = 42) -> pd.DataFrame:
+    """
+    Difference a - b for every metric with analytic (Welch) and bootstrap 95% CIs.
+
+    `significant` is True when the bootstrap CI of the difference excludes zero.
+    """
+    sa, sb = stats[a], stats[b]
+    rng = np.random.default_rng(seed)
+    rows: List[Dict] = []
+
+    diff = sa.means() - sb.means()
+    se = np.sqrt(sa.standard_errors() ** 2 + sb.standard_errors() ** 2)
+    boot_diff = sa.boot_means() - sb.boot_means()
+    for j, metric in enumerate(MEAN_METRICS):
+        lo, hi = np.nanpercentile(boot_diff[:, j], [2.5, 97.5])
+        rows.append({'metric': metric, 'a': sa.means()[j], 'b': sb.means()[j], 'diff': diff[j],
+                     'ci_low': diff[j] - Z_95 * se[j], 'ci_high': diff[j] + Z_95 * se[j],
+                     'boot_ci_low': lo, 'boot_ci_high': hi, 'significant': bool(lo > 0 or hi < 0)})
+
+    point_a, reps_a = sa.quantiles(rng)
+    point_b, reps_b = sb.quantiles(rng)
+    for j, metric in enumerate(QUANTILE_METRICS):
+        lo, hi = np.nanpercentile(reps_a[:, j] - reps_b[:, j], [2.5, 97.5])
+        rows.append({'metric': metric, 'a': point_a[j], 'b': point_b[j], 'diff': point_a[j] - point_b[j],
+                     'ci_low': np.nan, 'ci_high': np.nan, 'boot_ci_low': lo, 'boot_ci_high': hi,
+                     'significant': bool(lo > 0 or hi < 0)})
+    return pd.DataFrame(rows)
+
+
+def stream_from_snowflake(n_chunks: int = 50,
+                          table_prefix: str = SHIFT_LEVEL_TABLE_PREFIX) -> Iterator[pd.DataFrame]:
+    """
+    Materialize the shift-level query once, then read it back one shift_id hash bucket at a time.
+
+    The bucket is computed in the CTAS and the table is sorted and clustered on it,
+    so each bucket read prunes to its own micro-partitions instead of scanning the
+    table. The table name is unique per run, and the table is dropped when the
+    generator finishes or is closed. Only one chunk is held in memory at a time.
+    """
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'utils'))
+    from snowflake_connection import SnowflakeHook
+
+    snowhook = SnowflakeHook()
+    table = f"{table_prefix}_{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}"
+    with open(SHIFT_LEVEL_SQL, 'r') as f:
+        shift_query = f.read().strip().rstrip(';')
+    print(f"Materializing shift-level rows into {table}...")
+    try:
+        snowhook.query_without_result(
+            f"create table {table} cluster by (bucket) as\n"
+            f"select *, mod(abs(hash(shift_id)), {n_chunks}) as bucket\n"
+            f"from (\n{shift_query}\n)\n"
+            f"order by bucket"
+        )
+        for bucket in range(n_chunks):
+            query = f"select * exclude bucket from {table} where bucket = {bucket}"
+            chunk = snowhook.query_snowflake(query, method='pandas')
+            print(f"  chunk {bucket + 1}/{n_chunks}: {len(chunk):,} rows")
+            yield chunk
+    finally:
+        snowhook.query_without_result(f"drop table if exists {table}")
+        snowhook.close()
+
+
+def print_comparison(table: pd.DataFrame, title: str) -> None:
+    print("\n" + title)
+    print("-" * 110)
+    print(f"{'Metric':<38} {'A':>10} {'B':>10} {'Diff':>10} {'95% CI (analytic)':>22} {'95% CI (bootstrap)':>22}  Sig")
+    for _, r in table.iterrows():
+        analytic = '' if np.isnan(r['ci_low']) else f"[{r['ci_low']:+.4f}, {r['ci_high']:+.4f}]"
+        boot = f"[{r['boot_ci_low']:+.4f}, {r['boot_ci_high']:+.4f}]"
+        print(f"{r['metric']:<38} {r['a']:>10.4f} {r['b']:>10.4f} {r['diff']:>+10.4f} "
+              f"{analytic:>22} {boot:>22}  {'*' if r['significant'] else ''}")
+
+
+def main(chunks: Optional[Iterable[pd.DataFrame]] = None) -> Dict[Segment, SegmentStats]:
+    if chunks is None:
+        if '--from-csv' in sys.argv:
+            csv_path = sys.argv[sys.argv.index('--from-csv') + 1]
+            chunks = pd.read_csv(csv_path, chunksize=500_000)
+        else:
+            chunks = stream_from_snowflake()
+
+    stats = accumulate(chunks)
+    summary = segment_summary(stats)
+    summary.to_csv('new_dx_shift_level_summary_with_ci.csv', index=False)
+    print("\nSaved per-segment metrics with CIs to: new_dx_shift_level_summary_with_ci.csv")
+
+    comparisons = [
+        (('Y', True), ('Y', False), "NEW DX: First Dash (A) vs Not First Dash (B)"),
+        (('Y', True), ('N', False), "New DX First Dash (A) vs Existing DX Not First Dash (B)"),
+    ]
+    for a, b, title in comparisons:
+        if a in stats and b in stats:
+            print_comparison(compare_segments(stats, a, b), title)
+    return stats
+
+
+if __name__ == "__main__":
+    main()
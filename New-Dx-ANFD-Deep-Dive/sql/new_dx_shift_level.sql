@@ -0,0 +1,74 @@
+-- Shift-Level Detail: New DX vs Existing DX Assignment Patterns
+-- Purpose: One row per shift behind new_dx_summary_single_statement.sql, so the
+-- comparison metrics can be streamed in chunks and given confidence intervals
+-- (see shift_level_stats.py)
+
+-- Base shift data with new DX identification
+with tbl_has_shift_creation as (
+select distinct
+  date_trunc('week', convert_timezone('UTC', 'America/Los_Angeles', a.check_in_time)) as shift_check_in_week
+  , convert_timezone('UTC', 'America/Los_Angeles', a.check_in_time) as shift_check_in_time
+  , shift_id
+  , num_deliveries
+  , total_active_time_seconds
+  , adj_shift_seconds
+  , is_first_dash
+  , a.dasher_id
+  , num_assigns
+  , num_accepts
+  , case when date_trunc('week', c.applied_date) = date_trunc('week', shift_check_in_time::date) then 'Y' else 'N' end as new_dx_l7d
+  , div0(num_accepts, num_assigns) as ar
+  , div0(num_deliveries, num_accepts) as delivery_rate
+  , c.applied_date
+from edw.dasher.dasher_shifts a
+left join edw.dasher.dimension_dasher_applicants c on a.dasher_id = c.dasher_id
+where 1=1
+  and date_trunc('week', convert_timezone('UTC', 'America/Los_Angeles', a.check_in_time)) between dateadd('week', -4, date_trunc('week', current_date)) and dateadd('week', -1, date_trunc('week', current_date))
+)
+
+-- All assignments during the time period
+, all_assignments as (
+select
+  dasher_id
+  , shift_id
+  , delivery_id
+  , convert_timezone('UTC', 'America/Los_Angeles', created_at) as assignment_creation_time
+  , convert_timezone('UTC', 'America/Los_Angeles', accepted_at) as assignment_accepted_time 
+  , row_number() over(partition by dasher_id, shift_id order by created_at asc) as assignment_rn
+from proddb.prod_assignment.shift_delivery_assignment
+where 1=1
+  and date_trunc('week', convert_timezone('UTC', 'America/Los_Angeles', created_at)) between dateadd('week', -4, date_trunc('week', current_date)) and dateadd('week', -1, date_trunc('week', current_date))
+)
+
+-- First assignment per shift
+, first_assignment_per_shift as (
+select
+  *
+from all_assignments 
+where assignment_rn = 1
+)
+
+-- Combined data with assignment timing
+, shift_assignment_combined as (
+select 
+  a.*
+  , b.assignment_creation_time
+  , timediff('minutes', a.shift_check_in_time, b.assignment_creation_time) as minutes_to_first_assignment
+from tbl_has_shift_creation a
+left join first_assignment_per_shift b on a.dasher_id = b.dasher_id and a.shift_id = b.shift_id
+)
+
+-- Shift-level output
+select
+  new_dx_l7d
+  , is_first_dash
+  , dasher_id
+  , shift_id
+  , num_assigns
+  , num_accepts
+  , num_deliveries
+  , ar
+  , delivery_rate
+  , minutes_to_first_assignment
+  , adj_shift_seconds / 3600 as shift_hours
+from shift_assignment_combined
@@ -0,0 +1,247 @@
+"""
+Deterministic synthetic inputs for the benchmark suite.
+
+Every generator takes explicit sizes and a seed, so the same scale always produces
+byte-identical inputs and timings are comparable across runs and machines. Nothing
+here touches the network or Snowflake; the only repo files read are the ETL SQL
+scripts, which are benchmarked as-is.
+"""
+
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+ETL_DIR = REPO_ROOT / "snowflake-etl"
+ETL_SQL_FILES = (
+    "s0_tbl_applicant_funnel_timestamp_with_backfill_snowflake.sql",
+    "s1_tbl_major_steps_conversion_analysis_applied_L7D_cohort_snowflake.sql",
+)
+
+STATE_NAMES: List[str] = [
+    "Alabama", "Alaska", "Arizona", "Arkansas", "California", "Colorado", "Connecticut", "Delaware",
+    "District of Columbia", "Florida", "Georgia", "Hawaii", "Idaho", "Illinois", "Indiana", "Iowa",
+    "Kansas", "Kentucky", "Louisiana", "Maine", "Maryland", "Massachusetts", "Michigan", "Minnesota",
+    "Mississippi", "Missouri", "Montana", "Nebraska", "Nevada", "New Hampshire", "New Jersey",
+    "New Mexico", "New York", "North Carolina", "North Dakota", "Ohio", "Oklahoma", "Oregon",
+    "Pennsylvania", "Rhode Island", "South Carolina", "South Dakota", "Tennessee", "Texas", "Utah",
+    "Vermont", "Virginia", "Washington", "West Virginia", "Wisconsin", "Wyoming",
+]
+
+
+def _state_names(n: int) -> List[str]:
+    """Real state names first, then numbered copies once the 51 are used up."""
+    return [STATE_NAMES[i % len(STATE_NAMES)] + (f" {i // len(STATE_NAMES)}" if i >= len(STATE_NAMES) else "")
+            for i in range(n)]
+
+
+# --- ETL SQL ---------------------------------------------------------------
+
+def etl_sql_text(repeat: int = 1) -> str:
+    """The s0 + s1 ETL scripts concatenated `repeat` times."""
+    text = ";\n".join((ETL_DIR / name).read_text(encoding="utf-8") for name in ETL_SQL_FILES)
+    return ";\n".join([text] * repeat)
+
+
+# --- DOL minimum wage tables ------------------------------------------------
+
+def dol_historical_tables(n_years: int, row_repeat: int = 1, years_per_table: int = 10,
+                          seed: int = 0) -> List[pd.DataFrame]:
+    """
+    Tables shaped like the DOL history page after `pd.read_html`: a
+    'State or other jurisdiction' column plus one column per year, with the page's
+    cell notations ('$7.25', '...', footnote markers, blanks).
+    """
+    rng = np.random.default_rng(seed)
+    states = _state_names(len(STATE_NAMES) * row_repeat)
+    years = [str(1968 + 2 * i) for i in range(n_years)]
+    base = rng.uniform(1.0, 8.0, size=len(states))
+    tables = []
+    for start in range(0, n_years, years_per_table):
+        cols = years[start:start + years_per_table]
+        data: Dict[str, List[str]] = {"State or other jurisdiction": list(states)}
+        for j, year in enumerate(cols):
+            wages = base + 0.12 * (start + j) + rng.normal(0, 0.05, size=len(states))
+            draw = rng.random(len(states))
+            cells = np.array([f"${w:.2f} (b)" if 0.15 <= d < 0.20 else f"${w:.2f}"
+                              for w, d in zip(wages, draw)], dtype=object)
+            cells[draw < 0.15] = "..."
+            cells[(draw >= 0.20) & (draw < 0.23)] = ""
+            data[year] = list(cells)
+        tables.append(pd.DataFrame(data))
+    return tables
+
+
+# --- CPI ---------------------------------------------------------------------
+
+def cpi_source_records(n_months: int, direct_states: int = 10, seed: int = 0) -> Dict[str, List[Dict]]:
+    """
+    bls/fred/state record lists for `CPIDataScraper.create_comprehensive_cpi_dataset`:
+    a National series plus direct series for the first `direct_states` states.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2023-01-01", periods=n_months, freq="MS")
+
+    def series(location: str, source: str, level: float) -> List[Dict]:
+        values = level + np.cumsum(rng.normal(0.6, 0.3, size=n_months))
+        return [{"date": d.strftime("%Y-%m-%d"), "year": d.year, "month": d.month, "cpi_value": float(v),
+                 "location": location, "source": source} for d, v in zip(dates, values)]
+
+    bls = series("National", "BLS_API", 300.0)
+    for state in STATE_NAMES[:direct_states]:
+        bls += series(f"{state} metro", "BLS_API", rng.uniform(280, 330))
+    fred = series("National", "FRED", 300.5)
+    return {"bls_data": bls, "fred_data": fred, "state_data": []}
+
+
+def cpi_monthly_with_gaps(n_states: int, n_months: int, seed: int = 0) -> pd.DataFrame:
+    """Sparse state CPI observations (every month missing a third of the time) for `create_cpi_time_series`."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2023-01-01", periods=n_months, freq="MS")
+    rows = []
+    for i, state in enumerate(_state_names(n_states)):
+        values = rng.uniform(280, 330) + np.cumsum(rng.normal(0.6, 0.3, size=n_months))
+        keep = rng.random(n_months) > 1 / 3
+        keep[0] = True
+        for d, v in zip(dates[keep], values[keep]):
+            rows.append({"date": d, "state_name": state, "state_abbr": f"S{i:02d}", "cpi_value": float(v),
+                         "source": "BLS_API"})
+    return pd.DataFrame(rows)
+
+
+# --- Economic analysis inputs -----------------------------------------------
+
+def write_economic_inputs(base_dir: Path, n_states: int, n_months: int, seed: int = 0) -> Path:
+    """
+    Write the four CSVs `EconomicAnalysis.load_and_merge_data` reads, laid out as it
+    expects (apps and unemployment one directory up). Returns the directory to run in.
+
+    State names are synthetic single tokens ('State01', ...) so the state dummies of
+    the fixed-effects formula are valid patsy names.
+    """
+    rng = np.random.default_rng(seed)
+    work_dir = Path(base_dir) / "external_data"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    dates = pd.date_range("2023-01-01", periods=n_months, freq="MS")
+    states = [f"State{i + 1:02d}" for i in range(n_states)]
+    panel = pd.MultiIndex.from_product([states, dates], names=["state_name", "date"]).to_frame(index=False)
+    n = len(panel)
+
+    state_effect = np.repeat(rng.uniform(500, 5000, size=n_states), n_months)
+    unemployment = np.clip(np.repeat(rng.uniform(2.5, 6.0, size=n_states), n_months)
+                           + rng.normal(0, 0.4, size=n), 1.0, None)
+    apps = np.maximum(state_effect + 150 * unemployment + rng.normal(0, 200, size=n), 0).round()
+
+    panel.assign(apps_18plus=apps).to_csv(Path(base_dir) / "df_apps_by_state_output.csv", index=False)
+    panel.assign(unemployment_rate=unemployment.round(2)).to_csv(
+        Path(base_dir) / "bls_state_unemployment.csv", index=False)
+    panel.assign(minimum_wage=np.repeat(rng.choice([7.25, 10.0, 12.5, 15.0], size=n_states), n_months)).to_csv(
+        work_dir / "dol_monthly_minimum_wage_by_state.csv", index=False)
+    cpi = np.repeat(rng.uniform(280, 330, size=n_states), n_months) + np.tile(np.arange(n_months) * 0.6, n_states)
+    panel.assign(cpi_value=cpi).to_csv(work_dir / "monthly_cpi_by_state.csv", index=False)
+    return work_dir
+
+
+# --- Cost curves -------------------------------------------------------------
+
+def cost_curve_coefficients(n_curves: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Stacked coefficient rows (one per submarket) in the notebooks' coef_df layout,
+    cycling through the fitted kinds, with CPA increasing in spend.
+    """
+    rng = np.random.default_rng(seed)
+    kinds = np.array(["linear", "power", "quadratic", "sat_exp"])[np.arange(n_curves) % 4]
+    intercept = rng.uniform(30, 80, size=n_curves)
+    df = pd.DataFrame({
+        "submarket_id": np.arange(1, n_curves + 1),
+        "kind": kinds,
+        "Intercept": intercept,
+        "x_col": np.where(np.isin(kinds, ["linear", "quadratic"]), rng.uniform(1e-5, 1e-4, size=n_curves), np.nan),
+        "_pow_x": np.where(kinds == "power", rng.uniform(1e-10, 1e-9, size=n_curves), np.nan),
+        "_x2": np.where(kinds == "quadratic", rng.uniform(1e-11, 1e-10, size=n_curves), np.nan),
+        "_sat_x": np.where(kinds == "sat_exp", rng.uniform(40, 120, size=n_curves), np.nan),
+        "scale": np.where(kinds == "sat_exp", rng.uniform(2e-6, 1e-5, size=n_curves), np.nan),
+    })
+    return df
+
+
+def spend_grid(n_points: int, max_spend: float = 1_000_000) -> np.ndarray:
+    return np.linspace(max_spend / n_points, max_spend, n_points)
+
+
+# --- Shift-level events ------------------------------------------------------
+
+def shift_level_chunks(n_rows: int, chunk_rows: int = 100_000, seed: int = 0) -> Iterator[pd.DataFrame]:
+    """Shift-level rows in the layout of sql/new_dx_shift_level.sql, yielded in chunks."""
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_rows, chunk_rows):
+        n = min(chunk_rows, n_rows - start)
+        assigns = rng.poisson(1.5, n)
+        accepts = np.minimum(assigns, rng.poisson(1.0, n))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ar = np.where(assigns > 0, accepts / assigns, np.nan)
+        yield pd.DataFrame({
+            "new_dx_l7d": rng.choice(["Y", "N"], n, p=[0.1, 0.9]),
+            "is_first_dash": rng.random(n) < 0.05,
+            "dasher_id": rng.integers(0, max(n_rows // 4, 1), n),
+            "shift_id": np.arange(start, start + n),
+            "num_assigns": assigns,
+            "num_accepts": accepts,
+            "num_deliveries": np.minimum(accepts, rng.poisson(1.0, n)),
+            "ar": ar,
+            "delivery_rate": np.where(accepts > 0, rng.random(n), np.nan),
+            "minutes_to_first_assignment": np.where(assigns > 0, rng.exponential(8.0, n), np.nan),
+            "shift_hours": rng.gamma(2.0, 1.0, n),
+        })
+
+
+# --- Geography: states -> CBSAs -> ZCTAs -------------------------------------
+
+def geo_hierarchy(n_states: int, cbsas_per_state: int, zctas_per_side: int, seed: int = 0):
+    """
+    Planar (EPSG:5070) ZCTA and place layers shaped like `load_zctas` / `load_places`.
+
+    States are 400 km squares on a grid; each holds `cbsas_per_state` CBSA squares,
+    each split into zctas_per_side**2 ZCTAs with jittered edges. Every CBSA gets a
+    principal city (a disk over its core) and two small towns.
+    """
+    import geopandas as gpd
+    import shapely
+
+    rng = np.random.default_rng(seed)
+    state_size = 400_000.0
+    cbsa_cols = int(np.ceil(np.sqrt(cbsas_per_state)))
+    cbsa_size = state_size / cbsa_cols
+    zcta_size = cbsa_size / zctas_per_side
+    grid_cols = int(np.ceil(np.sqrt(n_states)))
+
+    zcta_boxes, zcta_codes, place_geoms, place_ids, place_names, place_states = [], [], [], [], [], []
+    for s in range(n_states):
+        sx, sy = (s % grid_cols) * state_size, (s // grid_cols) * state_size
+        statefp = f"{s + 1:02d}"
+        for c in range(cbsas_per_state):
+            cx = sx + (c % cbsa_cols) * cbsa_size
+            cy = sy + (c // cbsa_cols) * cbsa_size
+            ix, iy = np.meshgrid(np.arange(zctas_per_side), np.arange(zctas_per_side))
+            x0 = cx + ix.ravel() * zcta_size
+            y0 = cy + iy.ravel() * zcta_size
+            jitter = rng.uniform(-0.05, 0.05, size=(len(x0), 2)) * zcta_size
+            zcta_boxes.append(shapely.box(x0, y0, x0 + zcta_size + jitter[:, 0], y0 + zcta_size + jitter[:, 1]))
+            zcta_codes.extend(f"{(s * 1000 + c * 50) % 100_000 + k:05d}" for k in range(len(x0)))
+
+            center = shapely.Point(cx + cbsa_size / 2, cy + cbsa_size / 2)
+            towns = rng.uniform(0.1, 0.9, size=(2, 2)) * cbsa_size
+            geoms = [center.buffer(cbsa_size * 0.3, quad_segs=16)] + [
+                shapely.Point(cx + tx, cy + ty).buffer(zcta_size * 0.6, quad_segs=8) for tx, ty in towns]
+            for k, geom in enumerate(geoms):
+                place_geoms.append(geom)
+                place_ids.append(f"{statefp}{c:03d}{k:02d}")
+                place_names.append(f"City {statefp}-{c}" if k == 0 else f"Town {statefp}-{c}-{k}")
+                place_states.append(statefp)
+
+    zctas = gpd.GeoDataFrame({"ZCTA5": zcta_codes}, geometry=np.concatenate(zcta_boxes), crs=5070)
+    places = gpd.GeoDataFrame({"PLACE_GEOID": place_ids, "PLACE_NAME": place_names, "STATEFP": place_states},
+                              geometry=place_geoms, crs=5070)
+    return places, zctas
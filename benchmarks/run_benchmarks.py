@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the hot paths of the analysis scripts.
+
+Each stage builds deterministic synthetic inputs (fixtures.py) for a scale, then
+times the repo function on them and measures peak Python memory with tracemalloc
+in a separate run. Results are written as JSON, so two runs can be compared and
+slowdowns over a threshold flagged. Everything runs offline; stages whose target
+module cannot be imported (e.g. statsmodels not installed) are recorded as skipped.
+
+Stages:
+  sql.split_statements, sql.parse_target_table   snowflake-etl/sql_parsing.py on the s0 + s1 scripts
+  dol.process_tables, dol.time_series             enhanced_dol_processor.py
+  cpi.comprehensive_dataset, cpi.time_series      cpi_data_scraper.py
+  economic.load_and_merge, economic.fixed_effects comprehensive_economic_analysis.py
+  cost_curve.predict, cost_curve.allocate,
+  cost_curve.simulate                             daco-cost-curve
+  shift_level.accumulate                          New-Dx-ANFD-Deep-Dive/shift_level_stats.py
+  zcta.build_mapping, zcta.core_zipcodes          Dx-Local-Commerce-Analysis/zcta_place_mapping.py
+
+Usage:
+  python benchmarks/run_benchmarks.py                          # all stages, small + medium
+  python benchmarks/run_benchmarks.py --scales small,medium,large --only cost_curve
+  python benchmarks/run_benchmarks.py --compare benchmarks/results/baseline.json
+  python benchmarks/run_benchmarks.py --diff new.json baseline.json --threshold 0.2
+
+Exit code is 1 when a comparison finds a regression.
+"""
+
+import atexit
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import fixtures
+
+REPO_ROOT = fixtures.REPO_ROOT
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# Directories holding the benchmarked modules
+for _sub in ("snowflake-etl", "daco-cost-curve", "Dx-Local-Commerce-Analysis",
+             "Dx-Local-Commerce-Analysis/data/external/raw/external_data", "New-Dx-ANFD-Deep-Dive"):
+    if str(REPO_ROOT / _sub) not in sys.path:
+        sys.path.append(str(REPO_ROOT / _sub))
+
+# Sizes per scale: states -> CBSAs -> ZCTAs, 10 -> 10k spend points, 1x -> 100x event volumes.
+# "large" peaks around 450 MB RSS (10k draws x 10k spend levels is evaluated in blocks) and
+# takes ~6 minutes with --repeat 1.
+SCALES: Dict[str, Dict[str, int]] = {
+    "small": {
+        "sql_repeat": 1, "dol_years": 10, "dol_row_repeat": 1, "cpi_months": 12, "cpi_states": 10,
+        "econ_states": 10, "econ_months": 12, "curves": 50, "spend_points": 10, "mc_draws": 1_000,
+        "shift_rows": 10_000, "geo_states": 2, "cbsas_per_state": 4, "zctas_per_side": 4,
+    },
+    "medium": {
+        "sql_repeat": 10, "dol_years": 30, "dol_row_repeat": 4, "cpi_months": 31, "cpi_states": 51,
+        "econ_states": 30, "econ_months": 31, "curves": 200, "spend_points": 1_000, "mc_draws": 5_000,
+        "shift_rows": 100_000, "geo_states": 10, "cbsas_per_state": 6, "zctas_per_side": 8,
+    },
+    "large": {
+        "sql_repeat": 100, "dol_years": 55, "dol_row_repeat": 20, "cpi_months": 120, "cpi_states": 200,
+        "econ_states": 51, "econ_months": 120, "curves": 600, "spend_points": 10_000, "mc_draws": 10_000,
+        "shift_rows": 1_000_000, "geo_states": 50, "cbsas_per_state": 8, "zctas_per_side": 10,
+    },
+}
+DEFAULT_SCALES = ("small", "medium")
+DEFAULT_THRESHOLD = 0.10       # flag a stage when it is >10% slower (or uses >10% more memory)
+MIN_COMPARABLE_SECONDS = 0.005  # below this, timer noise dominates and time changes are not flagged
+MIN_COMPARABLE_MB = 1.0         # likewise for peak memory
+
+
+class SkipStage(Exception):
+    """Raised by a stage setup when its target cannot run here (e.g. missing dependency)."""
+
+
+def _require(module: str):
+    try:
+        return __import__(module)
+    except ImportError as exc:
+        raise SkipStage(f"cannot import {module}: {exc}") from exc
+
+
+# --- Stage setups: build inputs for a scale, return the callable to time -----
+
+def setup_sql_split(p: Dict[str, int]) -> Callable[[], object]:
+    sql_parsing = _require("sql_parsing")
+    text = fixtures.etl_sql_text(p["sql_repeat"])
+    return lambda: sql_parsing.split_sql_statements(text)
+
+
+def setup_sql_parse_target(p: Dict[str, int]) -> Callable[[], object]:
+    sql_parsing = _require("sql_parsing")
+    statements = [s for s in fixtures.etl_sql_text(p["sql_repeat"]).split(";") if s.strip()]
+    return lambda: [sql_parsing.parse_target_table(s) for s in statements]
+
+
+def setup_dol_tables(p: Dict[str, int]) -> Callable[[], object]:
+    dol = _require("enhanced_dol_processor")
+    tables = fixtures.dol_historical_tables(p["dol_years"], p["dol_row_repeat"])
+    return lambda: [r for i, t in enumerate(tables, 1) for r in dol.process_dol_historical_table(t, i)]
+
+
+def setup_dol_time_series(p: Dict[str, int]) -> Callable[[], object]:
+    dol = _require("enhanced_dol_processor")
+    tables = fixtures.dol_historical_tables(p["dol_years"], p["dol_row_repeat"])
+    with contextlib.redirect_stdout(io.StringIO()):
+        historical = pd.DataFrame([r for i, t in enumerate(tables, 1) for r in dol.process_dol_historical_table(t, i)])
+    return lambda: dol.create_comprehensive_time_series(historical)
+
+
+def setup_cpi_dataset(p: Dict[str, int]) -> Callable[[], object]:
+    cpi = _require("cpi_data_scraper")
+    sources = fixtures.cpi_source_records(p["cpi_months"])
+    # Bypass __init__ (it opens an HTTP session); the dataset builder only needs the state mapping
+    scraper = cpi.CPIDataScraper.__new__(cpi.CPIDataScraper)
+    scraper.state_mapping = scraper.create_state_mapping()
+
+    def run():
+        np.random.seed(0)  # the builder jitters national estimates with np.random
+        return scraper.create_comprehensive_cpi_dataset(**sources)
+    return run
+
+
+def setup_cpi_time_series(p: Dict[str, int]) -> Callable[[], object]:
+    cpi = _require("cpi_data_scraper")
+    df = fixtures.cpi_monthly_with_gaps(p["cpi_states"], p["cpi_months"])
+    end = (pd.Timestamp("2023-01-01") + pd.DateOffset(months=p["cpi_months"] - 1)).strftime("%Y-%m-%d")
+    return lambda: cpi.create_cpi_time_series(df, start_date="2023-01-01", end_date=end)
+
+
+def _economic_workdir(p: Dict[str, int]) -> Path:
+    tmp = Path(tempfile.mkdtemp(prefix="bench_econ_"))
+    atexit.register(shutil.rmtree, tmp, True)
+    return fixtures.write_economic_inputs(tmp, p["econ_states"], p["econ_months"])
+
+
+def _in_dir(path: Path, fn: Callable[[], object]) -> Callable[[], object]:
+    def run():
+        cwd = os.getcwd()
+        os.chdir(path)
+        try:
+            return fn()
+        finally:
+            os.chdir(cwd)
+    return run
+
+
+def setup_economic_merge(p: Dict[str, int]) -> Callable[[], object]:
+    econ = _require("comprehensive_economic_analysis")
+    work_dir = _economic_workdir(p)
+    return _in_dir(work_dir, lambda: econ.EconomicAnalysis().load_and_merge_data())
+
+
+def setup_economic_fixed_effects(p: Dict[str, int]) -> Callable[[], object]:
+    econ = _require("comprehensive_economic_analysis")
+    work_dir = _economic_workdir(p)
+    with contextlib.redirect_stdout(io.StringIO()):
+        merged = _in_dir(work_dir, lambda: econ.EconomicAnalysis().load_and_merge_data())()
+
+    def run():
+        analysis = econ.EconomicAnalysis()
+        analysis.data = merged.copy()
+        analysis.engineer_features()
+        return analysis.statistical_modeling()
+    return run
+
+
+def setup_cost_curve_predict(p: Dict[str, int]) -> Callable[[], object]:
+    curve_formulas = _require("curve_formulas")
+    coef_df = fixtures.cost_curve_coefficients(p["curves"])
+    grid = fixtures.spend_grid(p["spend_points"])
+    return lambda: curve_formulas.predict_curves(curve_formulas.curve_coefficients(coef_df), grid)
+
+
+def setup_cost_curve_allocate(p: Dict[str, int]) -> Callable[[], object]:
+    budget_allocator = _require("budget_allocator")
+    coef_df = fixtures.cost_curve_coefficients(p["curves"])
+    # Step sized so each curve has ~spend_points candidate increments
+    step = 1_000_000 / p["spend_points"]
+    return lambda: budget_allocator.allocate_budget(coef_df, total_budget=p["curves"] * 200_000,
+                                                    step=step, max_spend=1_000_000)
+
+
+def setup_cost_curve_simulate(p: Dict[str, int]) -> Callable[[], object]:
+    simulation = _require("cost_curve_simulation")
+    coef_row = fixtures.cost_curve_coefficients(4).iloc[[3]]   # a sat_exp curve
+    grid = fixtures.spend_grid(p["spend_points"])
+    return lambda: simulation.simulate_cost_curve(coef_row, grid, n_draws=p["mc_draws"], seed=0)
+
+
+def setup_shift_level(p: Dict[str, int]) -> Callable[[], object]:
+    shift_level_stats = _require("shift_level_stats")
+    chunks = list(fixtures.shift_level_chunks(p["shift_rows"]))
+    return lambda: shift_level_stats.accumulate(iter(chunks), n_boot=200, seed=0)
+
+
+def setup_zcta_mapping(p: Dict[str, int]) -> Callable[[], object]:
+    zcta_place_mapping = _require("zcta_place_mapping")
+    places, zctas = fixtures.geo_hierarchy(p["geo_states"], p["cbsas_per_state"], p["zctas_per_side"])
+    return lambda: zcta_place_mapping.build_mapping(places, zctas, n_jobs=1)
+
+
+def setup_zcta_core_zipcodes(p: Dict[str, int]) -> Callable[[], object]:
+    zcta_place_mapping = _require("zcta_place_mapping")
+    places, zctas = fixtures.geo_hierarchy(p["geo_states"], p["cbsas_per_state"], p["zctas_per_side"])
+    mapping = zcta_place_mapping.build_mapping(places, zctas, n_jobs=1)
+    # One principal city per CBSA, in the top_100_cities.csv layout (synthetic STATEFPs map back to real abbrs)
+    fips_to_abbr = {fips: abbr for abbr, fips in zcta_place_mapping.STATE_ABBR_TO_FIPS.items()}
+    cities = places[places["PLACE_NAME"].str.startswith("City") & places["STATEFP"].isin(fips_to_abbr)]
+    cities = pd.DataFrame({"CITY": cities["PLACE_NAME"].values,
+                           "STATE": cities["STATEFP"].map(fips_to_abbr).values})
+    return lambda: zcta_place_mapping.core_zipcodes(cities, mapping)
+
+
+STAGES: List[Tuple[str, Callable[[Dict[str, int]], Callable[[], object]]]] = [
+    ("sql.split_statements", setup_sql_split),
+    ("sql.parse_target_table", setup_sql_parse_target),
+    ("dol.process_tables", setup_dol_tables),
+    ("dol.time_series", setup_dol_time_series),
+    ("cpi.comprehensive_dataset", setup_cpi_dataset),
+    ("cpi.time_series", setup_cpi_time_series),
+    ("economic.load_and_merge", setup_economic_merge),
+    ("economic.fixed_effects", setup_economic_fixed_effects),
+    ("cost_curve.predict", setup_cost_curve_predict),
+    ("cost_curve.allocate", setup_cost_curve_allocate),
+    ("cost_curve.simulate", setup_cost_curve_simulate),
+    ("shift_level.accumulate", setup_shift_level),
+    ("zcta.build_mapping", setup_zcta_mapping),
+    ("zcta.core_zipcodes", setup_zcta_core_zipcodes),
+]
+
+
+# --- Measurement --------------------------------------------------------------
+
+def measure(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Wall time over `repeat` runs (after one warm-up), then one run under tracemalloc for peak memory."""
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        fn()
+        times = []
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "repeat": repeat,
+        "time_min_s": min(times),
+        "time_median_s": float(np.median(times)),
+        "time_mean_s": float(np.mean(times)),
+        "peak_mem_mb": peak / 1e6,
+    }
+
+
+def run_suite(scales, only: Optional[List[str]] = None, repeat: int = 3) -> List[Dict[str, object]]:
+    results: List[Dict[str, object]] = []
+    for scale in scales:
+        params = SCALES[scale]
+        for name, setup in STAGES:
+            if only and not any(token in name for token in only):
+                continue
+            record: Dict[str, object] = {"stage": name, "scale": scale}
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    fn = setup(params)
+                record.update(measure(fn, repeat))
+                record["status"] = "ok"
+                print(f"  {scale:<7} {name:<28} {record['time_median_s'] * 1000:10.1f} ms "
+                      f"{record['peak_mem_mb']:9.1f} MB")
+            except SkipStage as exc:
+                record.update({"status": "skipped", "reason": str(exc)})
+                print(f"  {scale:<7} {name:<28} skipped ({exc})")
+            except Exception as exc:
+                record.update({"status": "error", "reason": f"{type(exc).__name__}: {exc}"})
+                print(f"  {scale:<7} {name:<28} ERROR {type(exc).__name__}: {exc}")
+            results.append(record)
+    return results
+
+
+def environment() -> Dict[str, object]:
+    packages = {}
+    for module in ("numpy", "pandas", "shapely", "geopandas", "statsmodels", "sklearn"):
+        try:
+            packages[module] = __import__(module).__version__
+        except ImportError:
+            packages[module] = None
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": packages,
+    }
+
+
+# --- Comparison ---------------------------------------------------------------
+
+def compare(current: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD) -> pd.DataFrame:
+    """
+    Stage-by-stage ratio of current to baseline median time and peak memory.
+
+    `flag` is REGRESSION when either ratio exceeds 1 + threshold (changes on stages
+    below MIN_COMPARABLE_SECONDS / MIN_COMPARABLE_MB are ignored), IMPROVED when
+    the time ratio is below 1 - threshold.
+    """
+    base = {(r["stage"], r["scale"]): r for r in baseline["results"] if r.get("status") == "ok"}
+    rows = []
+    for r in current["results"]:
+        b = base.get((r["stage"], r["scale"]))
+        if r.get("status") != "ok" or b is None:
+            continue
+        time_ratio = r["time_median_s"] / b["time_median_s"] if b["time_median_s"] > 0 else np.nan
+        mem_ratio = r["peak_mem_mb"] / b["peak_mem_mb"] if b["peak_mem_mb"] > 0 else np.nan
+        timed = max(r["time_median_s"], b["time_median_s"]) >= MIN_COMPARABLE_SECONDS
+        sized = max(r["peak_mem_mb"], b["peak_mem_mb"]) >= MIN_COMPARABLE_MB
+        if (timed and time_ratio > 1 + threshold) or (sized and mem_ratio > 1 + threshold):
+            flag = "REGRESSION"
+        elif timed and time_ratio < 1 - threshold:
+            flag = "IMPROVED"
+        else:
+            flag = ""
+        rows.append({"stage": r["stage"], "scale": r["scale"],
+                     "baseline_ms": b["time_median_s"] * 1000, "current_ms": r["time_median_s"] * 1000,
+                     "time_ratio": time_ratio, "baseline_mb": b["peak_mem_mb"], "current_mb": r["peak_mem_mb"],
+                     "mem_ratio": mem_ratio, "flag": flag})
+    return pd.DataFrame(rows)
+
+
+def print_comparison(table: pd.DataFrame, threshold: float) -> int:
+    if table.empty:
+        print("No stages in common with the baseline.")
+        return 0
+    print(f"\nComparison against baseline (threshold {threshold:.0%})")
+    print(table.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    n_regressions = int((table["flag"] == "REGRESSION").sum())
+    print(f"\n{n_regressions} regression(s)")
+    return n_regressions
+
+
+def load_results(path) -> Dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def get_arg(name: str, default=None):
+    """Value following `name` on the command line, or default."""
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def main():
+    threshold = float(get_arg("--threshold", DEFAULT_THRESHOLD))
+
+    if "--diff" in sys.argv:
+        i = sys.argv.index("--diff")
+        current, baseline = load_results(sys.argv[i + 1]), load_results(sys.argv[i + 2])
+        sys.exit(1 if print_comparison(compare(current, baseline, threshold), threshold) else 0)
+
+    scales = get_arg("--scales", ",".join(DEFAULT_SCALES)).split(",")
+    unknown = set(scales) - set(SCALES)
+    if unknown:
+        raise SystemExit(f"Unknown scale(s) {sorted(unknown)}; expected {list(SCALES)}")
+    only = get_arg("--only")
+    repeat = int(get_arg("--repeat", 3))
+
+    print(f"Running benchmarks (scales: {', '.join(scales)}, repeat: {repeat})")
+    output = {**environment(), "scales": {s: SCALES[s] for s in scales}, "threshold": threshold,
+              "results": run_suite(scales, only.split(",") if only else None, repeat)}
+
+    out_path = Path(get_arg("--output", RESULTS_DIR / f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"))
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    print(f"\nSaved results to {out_path}")
+
+    baseline_path = get_arg("--compare")
+    if baseline_path:
+        sys.exit(1 if print_comparison(compare(output, load_results(baseline_path), threshold), threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
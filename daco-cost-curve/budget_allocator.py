@@ -0,0 +1,179 @@
+"""
+Split a total spend budget across submarkets by equalizing marginal cost.
+
+Takes per-submarket spend -> CPA curves (the stacked `coef_df` rows that
+`pred_formula` understands, plus a `submarket_id` column) and hands out the
+budget in fixed spend increments, always to the submarket whose next increment
+buys WAD/hours/new dx most cheaply. At the optimum every submarket that is not
+pinned at its min/max spend sits at (roughly) the same marginal cost.
+
+Two solvers are available:
+- "sorted" (default): builds the full (submarket x increment) marginal-cost
+  matrix in numpy and selects the cheapest increments with a partition. Solves
+  500+ submarkets at fine increments in well under a second.
+- "heap": the classic priority-queue greedy. Gives the same allocation; kept as
+  a reference and for very long grids where the matrix would not fit in memory.
+
+Usage:
+  from budget_allocator import allocate_budget
+  alloc = allocate_budget(sm_cpa_coef_df, total_budget=25_000_000, step=5_000,
+                          min_spend=20_000, max_spend=2_000_000, metric="wad")
+"""
+
+import heapq
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+from curve_formulas import UNITS_PER_APPLICANT, curve_coefficients, spend_to_output
+
+Bound = Union[None, float, str, pd.Series, np.ndarray]
+
+
+def _resolve_bound(coef_df: pd.DataFrame, bound: Bound, default: float, name: str) -> np.ndarray:
+    """Accept a scalar, a column name of coef_df, or an array/Series aligned to coef_df."""
+    if bound is None:
+        values = np.full(len(coef_df), default, dtype=float)
+    elif isinstance(bound, str):
+        values = coef_df[bound].to_numpy(dtype=float)
+    elif np.isscalar(bound):
+        values = np.full(len(coef_df), float(bound))
+    else:
+        values = np.asarray(bound, dtype=float)
+    if values.shape != (len(coef_df),):
+        raise ValueError(f"{name} must be a scalar, a column of coef_df, or one value per row")
+    return values
+
+
+def marginal_cost_matrix(coef_df: pd.DataFrame, min_spend: np.ndarray, max_spend: np.ndarray,
+                         step: float, metric: str = "wad") -> np.ndarray:
+    """
+    Cost per unit of `metric` for each spend increment above min_spend.
+
+    Returns shape (n_sm, n_steps); increments beyond a submarket's max_spend,
+    and increments that produce no additional output, are +inf.
+    """
+    units = _units_per_applicant(coef_df, metric)
+    coefs = curve_coefficients(coef_df)
+
+    n_steps = np.floor((max_spend - min_spend) / step + 1e-9).astype(int)
+    width = int(n_steps.max()) if len(n_steps) else 0
+    spend = min_spend[:, None] + step * np.arange(width + 1)[None, :]
+
+    output = spend_to_output(coefs, spend, units)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gain = np.diff(output, axis=1)
+        cost = np.where(gain > 0, step / gain, np.inf)
+    cost[~np.isfinite(cost)] = np.inf
+    cost[np.arange(width)[None, :] >= n_steps[:, None]] = np.inf
+    return cost
+
+
+def _units_per_applicant(coef_df: pd.DataFrame, metric: str) -> np.ndarray:
+    """Per-row conversion from applicants to metric; a `units_per_applicant` column overrides."""
+    if "units_per_applicant" in coef_df.columns:
+        return coef_df["units_per_applicant"].to_numpy(dtype=float)
+    if metric not in UNITS_PER_APPLICANT:
+        raise ValueError(f"Unsupported metric: {metric} (expected one of {sorted(UNITS_PER_APPLICANT)})")
+    return np.full(len(coef_df), UNITS_PER_APPLICANT[metric])
+
+
+def _take_sorted(cost: np.ndarray, n_take: int) -> np.ndarray:
+    """
+    Number of increments taken per submarket when the n_take globally cheapest are chosen.
+
+    Costs are replaced by their running max along each row first, which is exactly
+    the order a priority-queue greedy would take them in, so every pick is a prefix.
+    """
+    level = np.maximum.accumulate(cost, axis=1)
+    finite = level[np.isfinite(level)]
+    n_take = min(n_take, finite.size)
+    if n_take == 0:
+        return np.zeros(cost.shape[0], dtype=int)
+
+    threshold = np.partition(finite, n_take - 1)[n_take - 1]
+    below = (level < threshold).sum(axis=1)
+    at = (level == threshold).sum(axis=1)
+    remaining = n_take - int(below.sum())
+    # Hand out the tied increments in submarket order, mirroring the heap tie-break
+    before = np.concatenate([[0], np.cumsum(at)[:-1]])
+    return below + np.clip(remaining - before, 0, at)
+
+
+def _take_heap(cost: np.ndarray, n_take: int) -> np.ndarray:
+    """Priority-queue greedy: repeatedly buy the cheapest next increment across submarkets."""
+    n_sm, width = cost.shape
+    taken = np.zeros(n_sm, dtype=int)
+    heap = [(cost[i, 0], i) for i in range(n_sm) if width and np.isfinite(cost[i, 0])]
+    heapq.heapify(heap)
+    while n_take > 0 and heap:
+        _, i = heapq.heappop(heap)
+        taken[i] += 1
+        n_take -= 1
+        if taken[i] < width and np.isfinite(cost[i, taken[i]]):
+            heapq.heappush(heap, (cost[i, taken[i]], i))
+    return taken
+
+
+def allocate_budget(coef_df: pd.DataFrame, total_budget: float, *, step: float = 1_000,
+                    min_spend: Bound = None, max_spend: Bound = None, metric: str = "wad",
+                    method: str = "sorted", id_col: str = "submarket_id") -> pd.DataFrame:
+    """
+    Allocate total_budget across the submarket curves in coef_df.
+
+    coef_df: one spend -> CPA coefficient row per submarket, in the `run_regression`
+        summary layout, with `id_col` identifying the submarket. sat_exp/exp/log_shift/hill
+        rows also need their shape parameter column (see curve_formulas).
+    min_spend / max_spend: scalar, column name in coef_df, or per-row array.
+        min_spend defaults to 0; max_spend defaults to total_budget.
+    metric: output the marginal cost is measured against ("wad", "hours", "new_dx", "applicants").
+
+    Returns one row per submarket with the allocated spend, predicted applicants and
+    metric output, the marginal cost of the last increment bought, and which bound
+    (if any) is binding. The equalized marginal cost is stored in `df.attrs["marginal_cost"]`
+    and any budget that could not be placed in `df.attrs["unallocated"]`.
+    """
+    if step <= 0:
+        raise ValueError("step must be positive")
+    coef_df = coef_df.reset_index(drop=True)
+    lo = _resolve_bound(coef_df, min_spend, 0.0, "min_spend")
+    hi = _resolve_bound(coef_df, max_spend, float(total_budget), "max_spend")
+    if np.any(hi < lo):
+        raise ValueError("max_spend must be >= min_spend for every submarket")
+    if lo.sum() > total_budget:
+        raise ValueError(f"Sum of min_spend ({lo.sum():,.0f}) exceeds total_budget ({total_budget:,.0f})")
+
+    if method not in ("sorted", "heap"):
+        raise ValueError("method must be 'sorted' or 'heap'")
+
+    cost = marginal_cost_matrix(coef_df, lo, hi, step, metric)
+    n_take = int(np.floor((total_budget - lo.sum()) / step + 1e-9))
+    if cost.shape[1] == 0:
+        # No submarket has room for a single increment: everything stays at min_spend
+        taken = np.zeros(len(coef_df), dtype=int)
+    elif method == "sorted":
+        taken = _take_sorted(cost, n_take)
+    else:
+        taken = _take_heap(cost, n_take)
+
+    spend = lo + taken * step
+    units = _units_per_applicant(coef_df, metric)
+    output = spend_to_output(curve_coefficients(coef_df), spend[:, None], units)[:, 0]
+    last_cost = np.full(len(taken), np.nan)
+    bought = taken > 0
+    last_cost[bought] = cost[np.flatnonzero(bought), taken[bought] - 1]
+
+    binding = np.where(spend + step > hi + 1e-9, "max", np.where(taken == 0, "min", ""))
+    result = pd.DataFrame({
+        id_col: coef_df[id_col] if id_col in coef_df.columns else coef_df.index,
+        "spend": spend,
+        "applicants": output / units,
+        metric: output,
+        "marginal_cost": last_cost,
+        "binding": binding,
+    })
+    free = result["binding"] == ""
+    result.attrs["marginal_cost"] = float(np.nanmax(last_cost[free])) if free.any() else np.nan
+    result.attrs["unallocated"] = float(total_budget - spend.sum())
+    return result
@@ -0,0 +1,274 @@
+"""
+Monte Carlo uncertainty bands for the spend -> CPA -> new dx / WAD cost curves.
+
+The heuristic notebooks turn a fitted spend -> CPA curve into lifetime cost curves
+with fixed assumptions (0.7 incrementality, 0.28 lifetime conversion, 170 lifetime
+hours per new dx, 13 online hours per dx) and report single point values. This
+module draws the curve coefficients and those assumptions together, treats every
+draw as one coefficient row for `predict_curves`, and evaluates all draws against
+blocks of the spend grid as (n_draws x block) arrays - there is no Python loop over draws.
+
+Coefficient rows follow curve_formulas: linear/power/quadratic rows from
+`run_regression` work as-is, while sat_exp/exp/log_shift/hill rows need the
+`scale`/`shift`/`h`/`k` used in the fit added as a column, because `run_regression`
+does not record it.
+
+Usage:
+  from cost_curve_simulation import simulate_cost_curve
+  bands = simulate_cost_curve(spend_cpa_coef_df, np.arange(1000000, 20000001, 1000000),
+                              n_draws=100_000, coef_cov=model.cov_params())
+"""
+
+import warnings
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from curve_formulas import (
+    HOURS_PER_WAD,
+    INCREMENTALITY,
+    LIFETIME_CONVERSION_RATE,
+    LIFETIME_HOURS_PER_DX,
+    curve_coefficients,
+    predict_curves,
+)
+
+# (mean, standard deviation) of each conversion assumption. The means are the values
+# hard-coded in the notebooks; the spreads are a starting point and should be
+# overridden with whatever ranges the team agrees on.
+DEFAULT_ASSUMPTIONS: Dict[str, Tuple[float, float]] = {
+    "incrementality": (INCREMENTALITY, 0.05),
+    "lifetime_conversion_rate": (LIFETIME_CONVERSION_RATE, 0.02),
+    "lifetime_hours_per_dx": (LIFETIME_HOURS_PER_DX, 15.0),
+    "hours_per_wad": (HOURS_PER_WAD, 1.0),
+}
+
+# Fitted parameters per curve kind (names as they appear in coef_df)
+_KIND_PARAMS: Dict[str, Sequence[str]] = {
+    "linear": ("Intercept", "x_col"),
+    "power": ("Intercept", "_pow_x"),
+    "quadratic": ("Intercept", "x_col", "_x2"),
+    "sat_exp": ("Intercept", "_sat_x"),
+    "log": ("Intercept", "_log_x"),
+    "log_shift": ("Intercept", "_log_xs"),
+    "exp": ("Intercept", "_exp_x"),
+    "hill": ("Intercept", "_hill_x"),
+}
+
+METRICS = ("cpa", "applicants", "new_dx", "wad", "hours", "mcpd", "mcpwad", "mcpih")
+
+# Metric -> metrics it is computed from
+_METRIC_DEPS: Dict[str, Tuple[str, ...]] = {
+    "cpa": (),
+    "applicants": ("cpa",),
+    "new_dx": ("applicants",),
+    "hours": ("new_dx",),
+    "wad": ("hours",),
+    "mcpd": ("new_dx",),
+    "mcpwad": ("wad",),
+    "mcpih": ("hours",),
+}
+
+# Marginal metric -> the output it is the marginal cost of
+_MARGINAL_METRICS: Dict[str, str] = {"mcpd": "new_dx", "mcpwad": "wad", "mcpih": "hours"}
+
+# Draws x spend levels evaluated at once by simulate_cost_curve (~16 MB per float64 array)
+BLOCK_CELLS: int = 2_000_000
+
+
+def _normalize_cov(coef_cov: pd.DataFrame, params: Sequence[str]) -> np.ndarray:
+    """
+    Reorder a GLM `cov_params()` frame to `params`.
+
+    The GLM names the raw predictor after the x column (e.g. `paid_media_spend`);
+    `run_regression` renames it to `x_col` in coef_df, so the same is done here.
+    """
+    rename = {name: "x_col" for name in coef_cov.index
+              if name != "Intercept" and not str(name).startswith("_")}
+    cov = coef_cov.rename(index=rename, columns=rename)
+    return cov.loc[list(params), list(params)].to_numpy(dtype=float)
+
+
+def draw_coefficients(coef_row: pd.DataFrame, n_draws: int, rng: np.random.Generator, *,
+                      coef_cov: Optional[pd.DataFrame] = None, coef_rel_sd: float = 0.05) -> pd.DataFrame:
+    """
+    Sample n_draws coefficient rows around a single fitted row.
+
+    With coef_cov (the GLM `cov_params()`), draws are multivariate normal; otherwise
+    each fitted parameter gets an independent normal with sd = coef_rel_sd * |value|.
+    """
+    row = coef_row.reset_index(drop=True).iloc[[0]]
+    kind = row.loc[0, "kind"]
+    params = _KIND_PARAMS[kind]
+    mean = row.loc[0, list(params)].to_numpy(dtype=float)
+
+    if coef_cov is not None:
+        samples = rng.multivariate_normal(mean, _normalize_cov(coef_cov, params), size=n_draws)
+    else:
+        samples = mean + rng.standard_normal((n_draws, len(params))) * (coef_rel_sd * np.abs(mean))
+
+    draws = pd.DataFrame(np.repeat(row.to_numpy(), n_draws, axis=0), columns=row.columns)
+    draws[list(params)] = samples
+    return draws
+
+
+def draw_assumptions(n_draws: int, rng: np.random.Generator,
+                     assumptions: Optional[Dict[str, Tuple[float, float]]] = None) -> Dict[str, np.ndarray]:
+    """Sample each conversion assumption as a normal truncated to positive values, shape (n_draws, 1)."""
+    spec = {**DEFAULT_ASSUMPTIONS, **(assumptions or {})}
+    out: Dict[str, np.ndarray] = {}
+    for name, (mean, sd) in spec.items():
+        values = rng.normal(mean, sd, size=n_draws)
+        # Replace the (rare) non-positive samples with the mean rather than resampling
+        out[name] = np.where(values > 0, values, mean)[:, None]
+    return out
+
+
+def _required_metrics(metrics: Sequence[str]) -> set:
+    """The requested metrics plus everything they are computed from."""
+    needed: set = set()
+    stack = list(metrics)
+    while stack:
+        metric = stack.pop()
+        if metric not in needed:
+            needed.add(metric)
+            stack.extend(_METRIC_DEPS[metric])
+    return needed
+
+
+def _draw_inputs(coef_row: pd.DataFrame, n_draws: int, rng: np.random.Generator, *,
+                 coef_cov: Optional[pd.DataFrame], coef_rel_sd: float,
+                 assumptions: Optional[Dict[str, Tuple[float, float]]]) -> Tuple[Dict[str, np.ndarray],
+                                                                                 Dict[str, np.ndarray]]:
+    """Coefficient vectors (for `predict_curves`) and assumption vectors, one entry per draw."""
+    coefs = curve_coefficients(draw_coefficients(coef_row, n_draws, rng,
+                                                 coef_cov=coef_cov, coef_rel_sd=coef_rel_sd))
+    return coefs, draw_assumptions(n_draws, rng, assumptions)
+
+
+def _evaluate_draws(coefs: Dict[str, np.ndarray], a: Dict[str, np.ndarray], spending: np.ndarray,
+                    metrics: Sequence[str], has_lead: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Evaluate the draws on `spending`, computing only `metrics` and their inputs.
+
+    With has_lead, spending[0] is the point before the block: it only feeds the
+    first marginal value and is dropped from the returned (n_draws, n_spend - 1) arrays.
+    """
+    needed = _required_metrics(metrics)
+    # The CPA curve was fit on spend / (applicants * 0.7); rescale it to each drawn incrementality
+    values = {"cpa": predict_curves(coefs, spending) * INCREMENTALITY / a["incrementality"]}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if "applicants" in needed:
+            values["applicants"] = np.where(values["cpa"] > 0, spending / values["cpa"], np.nan)
+        if "new_dx" in needed:
+            values["new_dx"] = values["applicants"] * a["lifetime_conversion_rate"]
+        if "hours" in needed:
+            values["hours"] = values["new_dx"] * a["lifetime_hours_per_dx"]
+        if "wad" in needed:
+            values["wad"] = values["hours"] / a["hours_per_wad"]
+
+        d_spend = np.diff(spending)[None, :]
+        for metric, base in _MARGINAL_METRICS.items():
+            if metric in needed:
+                marginal = d_spend / np.diff(values[base], axis=1)
+                if not has_lead:
+                    marginal = np.hstack([np.full((marginal.shape[0], 1), np.nan), marginal])
+                values[metric] = marginal
+
+    start = 1 if has_lead else 0
+    return {m: values[m] if m in _MARGINAL_METRICS else values[m][:, start:] for m in metrics}
+
+
+def simulate_cost_curve_draws(coef_row: pd.DataFrame, spending, *, n_draws: int = 10_000,
+                              metrics: Sequence[str] = METRICS,
+                              coef_cov: Optional[pd.DataFrame] = None, coef_rel_sd: float = 0.05,
+                              assumptions: Optional[Dict[str, Tuple[float, float]]] = None,
+                              seed: Optional[int] = 42) -> Dict[str, np.ndarray]:
+    """
+    Evaluate every draw on the spend grid.
+
+    Returns a dict of (n_draws, n_spend) arrays for the requested metrics, so memory
+    grows with n_draws * n_spend; use `simulate_cost_curve` for percentile bands on
+    large grids. Marginal metrics follow `calc_marginal_cost`: the first spend point
+    has no predecessor and is NaN.
+    """
+    _check_metrics(metrics)
+    rng = np.random.default_rng(seed)
+    coefs, a = _draw_inputs(coef_row, n_draws, rng, coef_cov=coef_cov, coef_rel_sd=coef_rel_sd,
+                            assumptions=assumptions)
+    return _evaluate_draws(coefs, a, np.asarray(spending, dtype=float), metrics)
+
+
+def _check_metrics(metrics: Sequence[str]) -> None:
+    unknown = set(metrics) - set(METRICS)
+    if unknown:
+        raise ValueError(f"Unsupported metric(s): {sorted(unknown)}")
+
+
+def simulate_cost_curve(coef_row: pd.DataFrame, spending, *, n_draws: int = 10_000,
+                        percentiles: Sequence[float] = (5, 25, 50, 75, 95),
+                        metrics: Sequence[str] = ("cpa", "mcpd", "mcpwad"),
+                        coef_cov: Optional[pd.DataFrame] = None, coef_rel_sd: float = 0.05,
+                        assumptions: Optional[Dict[str, Tuple[float, float]]] = None,
+                        seed: Optional[int] = 42, block_cells: int = BLOCK_CELLS) -> pd.DataFrame:
+    """
+    Percentile bands for the requested metrics at each spend level.
+
+    Returns one row per spend level with `<metric>_point` (the unperturbed fit at the
+    assumption means), `<metric>_p<q>` columns for every percentile q, and
+    `<metric>_valid_frac`, the share of draws the percentiles are computed from.
+    Draws whose CPA is not positive have no applicants (NaN) and are left out of
+    the bands; a warning is issued whenever that happens.
+
+    The draws are sampled once and evaluated one block of spend levels at a time,
+    each block reduced to its percentiles before the next, so peak memory is set by
+    block_cells (draws x spend levels per block) rather than by the whole grid.
+    """
+    _check_metrics(metrics)
+    spending = np.asarray(spending, dtype=float)
+    rng = np.random.default_rng(seed)
+    coefs, a = _draw_inputs(coef_row, n_draws, rng, coef_cov=coef_cov, coef_rel_sd=coef_rel_sd,
+                            assumptions=assumptions)
+    spec = {**DEFAULT_ASSUMPTIONS, **(assumptions or {})}
+    point_coefs, point_a = _draw_inputs(coef_row, 1, np.random.default_rng(seed), coef_cov=None,
+                                        coef_rel_sd=0.0,
+                                        assumptions={k: (m, 0.0) for k, (m, _) in spec.items()})
+    point = _evaluate_draws(point_coefs, point_a, spending, metrics)
+
+    bands = {m: np.full((len(percentiles), len(spending)), np.nan) for m in metrics}
+    valid_frac = {m: np.ones(len(spending)) for m in metrics}
+    block = max(1, block_cells // max(n_draws, 1))
+    for start in range(0, len(spending), block):
+        stop = min(start + block, len(spending))
+        # Carry the previous spend level into the block so marginal metrics are continuous
+        lead = start > 0
+        values = _evaluate_draws(coefs, a, spending[start - lead:stop], metrics, has_lead=lead)
+        for metric in metrics:
+            block_values = values[metric]
+            nan = np.isnan(block_values)
+            valid_frac[metric][start:stop] = 1.0 - nan.mean(axis=0)
+            if not nan.any():
+                # np.percentile is several times faster than nanpercentile
+                bands[metric][:, start:stop] = np.percentile(block_values, percentiles, axis=0)
+                continue
+            # Leading NaN columns (first spend point of marginal metrics) would warn on every call
+            valid = ~np.all(nan, axis=0)
+            if valid.any():
+                bands[metric][:, start + np.flatnonzero(valid)] = np.nanpercentile(
+                    block_values[:, valid], percentiles, axis=0)
+
+    out = pd.DataFrame({"spending": spending})
+    for metric in metrics:
+        out[f"{metric}_point"] = point[metric][0]
+        for q, band in zip(percentiles, bands[metric]):
+            out[f"{metric}_p{q:g}"] = band
+        out[f"{metric}_valid_frac"] = valid_frac[metric]
+
+        # The first spend level of a marginal metric has no predecessor; that NaN is expected
+        checked = valid_frac[metric][1:] if metric in _MARGINAL_METRICS else valid_frac[metric]
+        if len(checked) and checked.min() < 1.0:
+            warnings.warn(f"{metric}: bands at {int((checked < 1.0).sum())} spend level(s) exclude draws "
+                          f"with non-positive CPA; as few as {checked.min():.1%} of draws remain "
+                          f"(see {metric}_valid_frac)", RuntimeWarning, stacklevel=2)
+    return out
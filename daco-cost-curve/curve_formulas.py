@@ -0,0 +1,154 @@
+"""
+Vectorized evaluation of fitted cost curves.
+
+The notebooks fit curves with `fit_all_curves` and evaluate them one coefficient
+row at a time with `pred_formula(s, coef_df)`. The helpers here take the same
+coefficient rows (columns `kind`, `Intercept`, `x_col`, `_pow_x`, `_x2`, ...) but
+stacked one row per submarket, and evaluate every row against a whole spend grid
+in one numpy expression.
+
+linear, power (p=2, as in `pred_formula`) and quadratic rows from `run_regression`
+work as-is. `run_regression` does not write the shape parameter of the other kinds
+into its summary row (an auto-selected scale is only printed), so the caller must
+add it as a column: `scale` for sat_exp and exp, `shift` for log_shift, `h` and
+`k` for hill. Rows missing it raise ValueError rather than being evaluated with a guess.
+
+Usage:
+  from curve_formulas import curve_coefficients, predict_curves
+  coefs = curve_coefficients(sm_cpa_coef_df)          # one row per submarket
+  cpa = predict_curves(coefs, spend_grid)             # shape (n_sm, n_spend)
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Conversion assumptions used by the heuristic cost curve notebooks
+INCREMENTALITY: float = 0.7                 # share of paid-media applicants that are incremental
+LIFETIME_CONVERSION_RATE: float = 0.28      # applicants -> new dx
+LIFETIME_HOURS_PER_DX: float = 170.0        # lifetime hours (52weeks) per new dx
+HOURS_PER_WAD: float = 13.0                 # online hours per dx
+
+SUPPORTED_KINDS = ("linear", "power", "quadratic", "sat_exp", "log", "log_shift", "exp", "hill")
+
+# Units produced per applicant for each output metric
+UNITS_PER_APPLICANT: Dict[str, float] = {
+    "applicants": 1.0,
+    "new_dx": LIFETIME_CONVERSION_RATE,
+    "hours": LIFETIME_CONVERSION_RATE * LIFETIME_HOURS_PER_DX,
+    "wad": LIFETIME_CONVERSION_RATE * LIFETIME_HOURS_PER_DX / HOURS_PER_WAD,
+}
+
+# Coefficient columns and the default used when a row does not carry them
+_COEF_DEFAULTS: Dict[str, float] = {
+    "Intercept": 0.0,
+    "x_col": 0.0,
+    "_pow_x": 0.0,
+    "_x2": 0.0,
+    "_sat_x": 0.0,
+    "_log_x": 0.0,
+    "_log_xs": 0.0,
+    "_exp_x": 0.0,
+    "_hill_x": 0.0,
+    "p": 2.0,        # pred_formula assumes p=2 for power fits
+}
+
+# Shape parameters with no neutral value: rows of these kinds must carry them
+_SHAPE_PARAMS: Dict[str, Tuple[str, ...]] = {
+    "sat_exp": ("scale",),
+    "exp": ("scale",),
+    "log_shift": ("shift",),
+    "hill": ("h", "k"),
+}
+
+
+def curve_coefficients(coef_df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Convert stacked coefficient rows into a dict of column vectors of shape (n, 1).
+
+    Missing coefficient columns and NaNs (e.g. `_x2` on a power row after concat)
+    fall back to neutral defaults. Shape parameters (`scale`, `shift`, `h`, `k`)
+    have no neutral value, so a row whose kind needs one and does not carry it
+    raises ValueError. `kind` is returned as an object array.
+    """
+    if "kind" not in coef_df.columns:
+        raise ValueError("coef_df must have a 'kind' column")
+    unknown = set(coef_df["kind"]) - set(SUPPORTED_KINDS)
+    if unknown:
+        raise ValueError(f"Unsupported kind(s): {sorted(unknown)}")
+
+    coefs: Dict[str, np.ndarray] = {"kind": coef_df["kind"].to_numpy(dtype=object)[:, None]}
+    for col, default in _COEF_DEFAULTS.items():
+        if col in coef_df.columns:
+            values = pd.to_numeric(coef_df[col], errors="coerce").fillna(default)
+            coefs[col] = values.to_numpy(dtype=float)[:, None]
+        else:
+            coefs[col] = np.full((len(coef_df), 1), default, dtype=float)
+
+    kinds = coef_df["kind"].to_numpy(dtype=object)
+    for param in sorted({p for params in _SHAPE_PARAMS.values() for p in params}):
+        needs = np.isin(kinds, [k for k, params in _SHAPE_PARAMS.items() if param in params])
+        values = (pd.to_numeric(coef_df[param], errors="coerce").to_numpy(dtype=float)
+                  if param in coef_df.columns else np.full(len(coef_df), np.nan))
+        missing = needs & np.isnan(values)
+        if missing.any():
+            bad = sorted(set(kinds[missing]))
+            raise ValueError(f"{missing.sum()} {'/'.join(bad)} row(s) have no '{param}' coefficient; "
+                             f"run_regression does not record it, add the value used in the fit as a "
+                             f"'{param}' column")
+        # Rows of other kinds never read the parameter; 1.0 keeps the evaluation finite
+        coefs[param] = np.where(needs, values, 1.0)[:, None]
+    return coefs
+
+
+def predict_curves(coefs: Dict[str, np.ndarray], x) -> np.ndarray:
+    """
+    Evaluate every coefficient row on x, like `pred_formula` but for many rows at once.
+
+    x may be 1-D (shared grid, broadcast to every row) or 2-D with one row per curve.
+    Returns an array of shape (n_curves, n_points).
+    """
+    x = np.asarray(x, dtype=float)
+    if x.ndim == 1:
+        x = x[None, :]
+    kind = coefs["kind"]
+    out = np.full(np.broadcast_shapes(kind.shape, x.shape), np.nan)
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for k in np.unique(kind):
+            rows = (kind == k)[:, 0]
+            xs = x if x.shape[0] == 1 else x[rows]
+            c = {name: arr[rows] for name, arr in coefs.items() if name != "kind"}
+            if k == "linear":
+                y = c["Intercept"] + c["x_col"] * xs
+            elif k == "power":
+                y = c["Intercept"] + c["_pow_x"] * np.power(xs, c["p"])
+            elif k == "quadratic":
+                y = c["Intercept"] + c["_x2"] * xs ** 2 + c["x_col"] * xs
+            elif k == "sat_exp":
+                y = c["Intercept"] + c["_sat_x"] * (1.0 - np.exp(-c["scale"] * xs))
+            elif k == "log":
+                y = c["Intercept"] + c["_log_x"] * np.log(xs)
+            elif k == "log_shift":
+                y = c["Intercept"] + c["_log_xs"] * np.log(xs + c["shift"])
+            elif k == "exp":
+                y = c["Intercept"] + c["_exp_x"] * np.exp(xs / c["scale"])
+            else:  # hill
+                y = c["Intercept"] + c["_hill_x"] * xs ** c["h"] / (c["k"] ** c["h"] + xs ** c["h"])
+            out[rows] = y
+    return out
+
+
+def spend_to_output(coefs: Dict[str, np.ndarray], spend, units_per_applicant) -> np.ndarray:
+    """
+    Turn spend -> CPA curves into spend -> output (applicants * units_per_applicant).
+
+    Non-positive or non-finite CPA yields NaN output.
+    """
+    spend = np.asarray(spend, dtype=float)
+    cpa = predict_curves(coefs, spend)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        applicants = np.where(cpa > 0, spend / cpa, np.nan)
+    applicants = np.where(spend == 0, 0.0, applicants)
+    return applicants * np.asarray(units_per_applicant, dtype=float).reshape(-1, 1)
@@ -0,0 +1,175 @@
+"""
+Power / MDE simulation for submarket-level DACO spend experiments.
+
+Takes historical weekly per-submarket series (e.g. the weekly `wad` or
+`active_hours` rows from tbl_daco_experiment_master_tracking) and estimates, by
+permutation test on that history, how often a given design would detect a given
+lift. Every combination of test window, random test/control assignment and
+effect size is evaluated in batch:
+
+- outcome per submarket = log(mean over test window / mean over the pre window)
+- test statistic = mean outcome of test SMs - mean outcome of control SMs
+- a relative lift e is injected by adding log(1 + e) to the test SMs' outcome
+
+Because the statistic is linear in the outcome, the permutation null for every
+window and assignment reduces to two matrix products (contrasts @ outcomes and
+contrasts @ assignments), so no loop over windows, assignments or permutations
+is needed. Designs (duration x test fraction) can be spread across a process pool.
+
+Usage:
+  from mde_simulation import power_surface, minimum_detectable_effect
+  surface = power_surface(df_weekly, metric="wad", durations=[4, 8, 12],
+                          treat_fracs=[0.3, 0.5], effects=[0.01, 0.02, 0.05], n_jobs=4)
+  mde = minimum_detectable_effect(surface, power=0.8)
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def weekly_matrix(df: pd.DataFrame, metric: str, *, sm_col: str = "submarket_id",
+                  week_col: str = "week") -> pd.DataFrame:
+    """
+    Pivot long weekly rows into a (submarket x week) matrix of `metric`.
+
+    Submarkets with a missing or non-positive week are dropped, since the
+    outcome is a log ratio.
+    """
+    wide = df.pivot_table(index=sm_col, columns=week_col, values=metric, aggfunc="sum")
+    wide = wide.sort_index(axis=1)
+    keep = wide.notna().all(axis=1) & (wide > 0).all(axis=1)
+    if (d := int((~keep).sum())) > 0:
+        print(f"[mde] Dropped {d} submarkets with missing or non-positive weeks.")
+    return wide.loc[keep]
+
+
+def window_outcomes(values: np.ndarray, duration: int, pre_weeks: int) -> np.ndarray:
+    """
+    Log ratio of test-window mean to pre-window mean for every feasible window start.
+
+    values: (n_sm, n_weeks). Returns (n_windows, n_sm).
+    """
+    n_weeks = values.shape[1]
+    n_windows = n_weeks - pre_weeks - duration + 1
+    if n_windows < 1:
+        raise ValueError(f"Need at least {pre_weeks + duration} weeks of history, got {n_weeks}")
+    csum = np.concatenate([np.zeros((values.shape[0], 1)), np.cumsum(values, axis=1)], axis=1)
+    starts = np.arange(pre_weeks, pre_weeks + n_windows)
+    pre = (csum[:, starts] - csum[:, starts - pre_weeks]) / pre_weeks
+    post = (csum[:, starts + duration] - csum[:, starts]) / duration
+    return np.log(post / pre).T
+
+
+def random_assignments(n_sm: int, n_treat: int, n: int, rng: np.random.Generator) -> np.ndarray:
+    """n random complete-randomization assignments as a boolean (n, n_sm) matrix."""
+    return rng.random((n, n_sm)).argsort(axis=1) < n_treat
+
+
+def _contrasts(assign: np.ndarray) -> np.ndarray:
+    """Row i gives weights so that contrast @ y = mean(y[test]) - mean(y[control])."""
+    n_treat = assign.sum(axis=1, keepdims=True)
+    n_ctrl = assign.shape[1] - n_treat
+    return np.where(assign, 1.0 / n_treat, -1.0 / n_ctrl)
+
+
+def simulate_design(values: np.ndarray, *, duration: int, treat_frac: float, effects: Sequence[float],
+                    pre_weeks: int = 8, n_assignments: int = 200, n_permutations: int = 500,
+                    alpha: float = 0.05, seed: Optional[int] = None,
+                    assignments: Optional[np.ndarray] = None) -> List[Dict[str, float]]:
+    """
+    Permutation power of one design across every window, assignment and effect.
+
+    assignments: optional fixed (n, n_sm) boolean matrix (e.g. an existing
+        exp_group split, rows ordered like `values`); its test-arm size overrides
+        treat_frac. Otherwise n_assignments random splits are drawn.
+    Returns one row per effect with the share of (window, assignment) cases
+    rejected at alpha.
+    """
+    rng = np.random.default_rng(seed)
+    n_sm = values.shape[0]
+    if assignments is not None:
+        assignments = np.atleast_2d(np.asarray(assignments, dtype=bool))
+        n_treat = int(assignments[0].sum())
+    else:
+        n_treat = int(round(treat_frac * n_sm))
+    if not 0 < n_treat < n_sm:
+        raise ValueError(f"treat_frac={treat_frac} leaves an empty arm with {n_sm} submarkets")
+
+    outcomes = window_outcomes(values, duration, pre_weeks)                         # (W, S)
+    if assignments is None:
+        assignments = random_assignments(n_sm, n_treat, n_assignments, rng)         # (A, S)
+    perms = random_assignments(n_sm, n_treat, n_permutations, rng)                  # (P, S)
+
+    c_assign = _contrasts(assignments)
+    c_perm = _contrasts(perms)
+    base_obs = outcomes @ c_assign.T                                                # (W, A)
+    base_null = outcomes @ c_perm.T                                                 # (W, P)
+    overlap = c_perm @ assignments.T.astype(float)                                  # (P, A)
+
+    rows = []
+    for effect in effects:
+        delta = np.log1p(effect)
+        obs = np.abs(base_obs + delta)                                              # (W, A)
+        null = np.abs(base_null[:, :, None] + delta * overlap[None, :, :])          # (W, P, A)
+        # +1 in numerator and denominator counts the observed split itself
+        p_values = ((null >= obs[:, None, :]).sum(axis=1) + 1) / (n_permutations + 1)
+        rows.append({
+            "duration_weeks": duration,
+            "treat_frac": treat_frac,
+            "n_test_sms": n_treat,
+            "effect": effect,
+            "power": float((p_values <= alpha).mean()),
+            "n_windows": outcomes.shape[0],
+            "n_assignments": assignments.shape[0],
+        })
+    return rows
+
+
+def _simulate_design_task(task: Dict) -> List[Dict[str, float]]:
+    kwargs = {k: v for k, v in task.items() if k != "values"}
+    return simulate_design(task["values"], **kwargs)
+
+
+def power_surface(df: pd.DataFrame, metric: str, *, durations: Sequence[int],
+                  treat_fracs: Sequence[float] = (0.5,), effects: Sequence[float] = (0.01, 0.02, 0.03, 0.05),
+                  pre_weeks: int = 8, n_assignments: int = 200, n_permutations: int = 500,
+                  alpha: float = 0.05, seed: int = 42, n_jobs: int = 1,
+                  sm_col: str = "submarket_id", week_col: str = "week") -> pd.DataFrame:
+    """
+    Power for every (duration, test fraction, effect) combination.
+
+    df: long weekly rows with sm_col, week_col and metric.
+    n_jobs > 1 runs the (duration, test fraction) designs on a process pool.
+    """
+    values = weekly_matrix(df, metric, sm_col=sm_col, week_col=week_col).to_numpy(dtype=float)
+    tasks = [
+        dict(values=values, duration=d, treat_frac=f, effects=list(effects), pre_weeks=pre_weeks,
+             n_assignments=n_assignments, n_permutations=n_permutations, alpha=alpha, seed=seed + i)
+        for i, (d, f) in enumerate((d, f) for d in durations for f in treat_fracs)
+    ]
+
+    if n_jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            results = list(pool.map(_simulate_design_task, tasks))
+    else:
+        results = [_simulate_design_task(t) for t in tasks]
+
+    surface = pd.DataFrame([row for rows in results for row in rows])
+    surface.insert(0, "metric", metric)
+    return surface
+
+
+def minimum_detectable_effect(surface: pd.DataFrame, power: float = 0.8) -> pd.DataFrame:
+    """
+    Smallest simulated effect reaching `power` for each design.
+
+    Designs where no simulated effect reaches the target get NaN; widen `effects`.
+    """
+    keys = ["metric", "duration_weeks", "treat_frac", "n_test_sms"]
+    hit = surface[surface["power"] >= power]
+    mde = hit.groupby(keys, as_index=False)["effect"].min().rename(columns={"effect": "mde"})
+    designs = surface[keys].drop_duplicates()
+    return designs.merge(mde, on=keys, how="left").sort_values(keys).reset_index(drop=True)
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Local store of daily DX (Dasher) applicant counts, refreshed incrementally.
+
+query_dx_applicants.py re-counts every day since Monday on each run. This module
+keeps the daily counts in data/daily_dx_applicants.csv and only queries Snowflake
+for the days that can still change: from the last complete day (minus a
+restatement window for late-arriving applications) through today. Fresh rows
+replace the stored rows for those days; older days are never re-queried.
+
+Week-over-week and date-range summaries are computed from the store alone, so
+they work without a Snowflake connection.
+
+Usage:
+  from applicant_store import refresh_store, load_store, week_over_week, date_range_summary
+  store = refresh_store(SnowflakeHook())
+  print(week_over_week(load_store()))
+"""
+
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_PATH = os.path.join(BASE_DIR, 'data', 'daily_dx_applicants.csv')
+RANGE_SQL_PATH = os.path.join(BASE_DIR, 'sql', 'daily_dx_applicants_range.sql')
+
+# applied_date is bucketed in Pacific Time by the SQL, so "today" is too
+TIMEZONE_NAME = 'America/Los_Angeles'
+
+# Complete days re-queried on every refresh to pick up late-arriving applications
+DEFAULT_RESTATEMENT_DAYS = 2
+
+STORE_COLUMNS = ['applied_date', 'daily_applicant_count', 'is_complete', 'refreshed_at']
+
+
+def today_pacific() -> date:
+    return datetime.now(ZoneInfo(TIMEZONE_NAME)).date()
+
+
+def week_start(day: date) -> date:
+    """Monday of the week containing `day` (same convention as the from-Monday SQL)."""
+    return day - timedelta(days=day.weekday())
+
+
+def load_store(path: str = STORE_PATH) -> pd.DataFrame:
+    """Stored daily counts, one row per day, sorted by applied_date (empty if no store yet)."""
+    if not os.path.exists(path):
+        return pd.DataFrame({
+            'applied_date': pd.Series(dtype='datetime64[ns]'),
+            'daily_applicant_count': pd.Series(dtype='int64'),
+            'is_complete': pd.Series(dtype=bool),
+            'refreshed_at': pd.Series(dtype=object),
+        })
+    store = pd.read_csv(path, parse_dates=['applied_date'])
+    store['daily_applicant_count'] = store['daily_applicant_count'].astype('int64')
+    store['is_complete'] = store['is_complete'].astype(bool)
+    return store.sort_values('applied_date').reset_index(drop=True)
+
+
+def save_store(store: pd.DataFrame, path: str = STORE_PATH) -> None:
+    """Write the store atomically, so an interrupted run never leaves a truncated file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    out = store[STORE_COLUMNS].copy()
+    out['applied_date'] = out['applied_date'].dt.strftime('%Y-%m-%d')
+    out.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def last_complete_day(store: pd.DataFrame) -> Optional[date]:
+    complete = store.loc[store['is_complete'], 'applied_date']
+    return complete.max().date() if len(complete) else None
+
+
+def refresh_window(store: pd.DataFrame, today: date, restatement_days: int = DEFAULT_RESTATEMENT_DAYS,
+                   backfill_start: Optional[date] = None) -> Tuple[date, date]:
+    """
+    Days [start, end] to (re-)query.
+
+    An empty store is backfilled from `backfill_start` (default: Monday this week).
+    Otherwise the window starts `restatement_days` before the last complete day;
+    any gap since then is covered because the window always runs through today.
+    A `backfill_start` earlier than the first stored day extends the window back to it.
+    """
+    last_complete = last_complete_day(store)
+    if last_complete is None:
+        start = backfill_start or week_start(today)
+    else:
+        start = last_complete - timedelta(days=restatement_days)
+        if backfill_start is not None and backfill_start < store['applied_date'].min().date():
+            start = min(start, backfill_start)
+    return min(start, today), today
+
+
+def merge_counts(store: pd.DataFrame, fresh: pd.DataFrame, start: date, end: date,
+                 today: date, refreshed_at: str) -> pd.DataFrame:
+    """
+    Replace the stored days in [start, end] with `fresh`.
+
+    Every day of the window gets a row (0 when the query returned none), so a
+    day without applicants is still recorded as covered. Today is marked incomplete.
+    """
+    days = pd.date_range(start, end, freq='D')
+    counts = fresh.copy()
+    counts.columns = counts.columns.str.lower()
+    counts['applied_date'] = pd.to_datetime(counts['applied_date'])
+    counts = (counts.set_index('applied_date')['daily_applicant_count']
+              .reindex(days, fill_value=0).astype('int64')
+              .rename_axis('applied_date').reset_index())
+    counts['is_complete'] = counts['applied_date'].dt.date < today
+    counts['refreshed_at'] = refreshed_at
+
+    kept = store[~store['applied_date'].between(days[0], days[-1])]
+    frames = [df for df in (kept, counts) if len(df)]
+    return pd.concat(frames, ignore_index=True).sort_values('applied_date').reset_index(drop=True)
+
+
+def refresh_store(sf, restatement_days: int = DEFAULT_RESTATEMENT_DAYS, backfill_start: Optional[date] = None,
+                  path: str = STORE_PATH) -> pd.DataFrame:
+    """Query only the refresh window, merge it into the store and save it."""
+    store = load_store(path)
+    today = today_pacific()
+    start, end = refresh_window(store, today, restatement_days, backfill_start)
+
+    with open(RANGE_SQL_PATH, 'r') as file:
+        query = file.read().format(start_date=start.isoformat(), end_date=end.isoformat())
+    print(f"Querying applied_date {start} to {end} ({(end - start).days + 1} day(s))...")
+    fresh = sf.query_snowflake(query, method='pandas')
+
+    store = merge_counts(store, fresh, start, end, today, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    save_store(store, path)
+    return store
+
+
+def daily_counts(store: pd.DataFrame, start: date, end: date) -> pd.DataFrame:
+    """Stored days in [start, end] with day_of_week and cumulative_count, as in the from-Monday SQL."""
+    rows = store[store['applied_date'].between(pd.Timestamp(start), pd.Timestamp(end))].copy()
+    rows['day_of_week'] = rows['applied_date'].dt.strftime('%a')
+    rows['cumulative_count'] = rows['daily_applicant_count'].cumsum()
+    return rows[['applied_date', 'day_of_week', 'daily_applicant_count', 'cumulative_count', 'is_complete']]
+
+
+def date_range_summary(store: pd.DataFrame, start: date, end: date) -> Dict[str, object]:
+    """Totals for [start, end] from the store; `missing_days` counts days the store does not cover."""
+    rows = daily_counts(store, start, end)
+    n_days = (end - start).days + 1
+    summary: Dict[str, object] = {
+        'start_date': start.isoformat(),
+        'end_date': end.isoformat(),
+        'days_in_range': n_days,
+        'days_covered': len(rows),
+        'missing_days': n_days - len(rows),
+        'includes_partial_day': bool((~rows['is_complete']).any()),
+        'total_applicants': int(rows['daily_applicant_count'].sum()),
+        'avg_daily_applicants': float(rows['daily_applicant_count'].mean()) if len(rows) else float('nan'),
+    }
+    if len(rows):
+        max_day = rows.loc[rows['daily_applicant_count'].idxmax()]
+        min_day = rows.loc[rows['daily_applicant_count'].idxmin()]
+        summary['highest_day'] = max_day['applied_date'].strftime('%Y-%m-%d')
+        summary['highest_count'] = int(max_day['daily_applicant_count'])
+        summary['lowest_day'] = min_day['applied_date'].strftime('%Y-%m-%d')
+        summary['lowest_count'] = int(min_day['daily_applicant_count'])
+    return summary
+
+
+def week_over_week(store: pd.DataFrame, weeks: int = 4, as_of: Optional[date] = None) -> pd.DataFrame:
+    """
+    Monday-start weekly totals for the last `weeks` weeks up to `as_of`.
+
+    Each week is compared like-for-like with the prior week: `prior_week_same_days`
+    sums the prior week over the same weekdays this week has data for, so a
+    week in progress is compared with the matching part of last week.
+    """
+    as_of = as_of or today_pacific()
+    rows = store[store['applied_date'] <= pd.Timestamp(as_of)].copy()
+    rows['week_start'] = rows['applied_date'] - pd.to_timedelta(rows['applied_date'].dt.weekday, unit='D')
+    rows['weekday'] = rows['applied_date'].dt.weekday
+    by_day = rows.set_index(['week_start', 'weekday'])['daily_applicant_count']
+
+    records = []
+    current = pd.Timestamp(week_start(as_of))
+    for i in range(weeks - 1, -1, -1):
+        this_week = current - pd.Timedelta(weeks=i)
+        prior_week = this_week - pd.Timedelta(weeks=1)
+        this_days = by_day.xs(this_week, level='week_start') if this_week in by_day.index.get_level_values(0) \
+            else pd.Series(dtype='int64')
+        prior_days = by_day.xs(prior_week, level='week_start') if prior_week in by_day.index.get_level_values(0) \
+            else pd.Series(dtype='int64')
+        prior_same = prior_days.reindex(this_days.index)
+        total = int(this_days.sum())
+        prior_total = int(prior_same.sum()) if prior_same.notna().all() and len(prior_same) else None
+        records.append({
+            'week_start': this_week.strftime('%Y-%m-%d'),
+            'days_covered': len(this_days),
+            'total_applicants': total,
+            'prior_week_same_days': prior_total,
+            'wow_change': total - prior_total if prior_total is not None else None,
+            'wow_pct': (total / prior_total - 1) * 100 if prior_total else None,
+        })
+    return pd.DataFrame(records)
@@ -4,21 +4,44 @@ Query to get daily DX (Dasher) applicant counts starting from Monday this week.
 
 This script executes a SQL query to count the number of dasher applicants per day
 starting from Monday of the current week.
+
+Modes:
+  python query_dx_applicants.py                  # full query from Monday (no local state)
+  python query_dx_applicants.py --incremental    # refresh the local store, then summarize
+  python query_dx_applicants.py --offline        # summarize from the local store only
+
+Options for --incremental / --offline:
+  --restatement-days N     complete days to re-query for late data (default 2)
+  --backfill-start DATE    first day to load when the store is empty or needs older days
+  --start DATE --end DATE  summarize an arbitrary date range (YYYY-MM-DD)
+  --weeks N                number of weeks in the week-over-week table (default 4)
 """
 
 import sys
 import os
 import pandas as pd
-from datetime import datetime
+from datetime import date, datetime
 
-# Add the utils directory to the path to import SnowflakeHook
+# Add the utils directory to the path to import SnowflakeHook (imported where a
+# connection is needed, so --offline works without the Snowflake dependencies)
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'utils'))
-from snowflake_connection import SnowflakeHook
+
+from applicant_store import (
+    DEFAULT_RESTATEMENT_DAYS,
+    daily_counts,
+    date_range_summary,
+    load_store,
+    refresh_store,
+    today_pacific,
+    week_over_week,
+    week_start,
+)
 
 def main():
     """Execute the DX applicants query and display results."""
     
     # Initialize Snowflake connection
+    from snowflake_connection import SnowflakeHook
     sf = SnowflakeHook()
     
     # Read the SQL query
@@ -71,5 +94,62 @@ def main():
         # Connection is handled automatically by the SnowflakeHook
         pass
 
+def get_arg(name, default=None):
+    """Value following `name` on the command line, or default."""
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def incremental_main(offline=False):
+    """Refresh the local daily store (unless offline) and summarize from it."""
+    backfill_start = get_arg('--backfill-start')
+    backfill_start = date.fromisoformat(backfill_start) if backfill_start else None
+
+    if offline:
+        store = load_store()
+        if store.empty:
+            print("Local store is empty. Run with --incremental first.")
+            return
+    else:
+        from snowflake_connection import SnowflakeHook
+        restatement_days = int(get_arg('--restatement-days', DEFAULT_RESTATEMENT_DAYS))
+        store = refresh_store(SnowflakeHook(), restatement_days=restatement_days, backfill_start=backfill_start)
+
+    refreshed_at = store['refreshed_at'].max()
+    today = today_pacific()
+    start = date.fromisoformat(get_arg('--start', week_start(today).isoformat()))
+    end = date.fromisoformat(get_arg('--end', today.isoformat()))
+
+    print(f"\nDaily DX Applicant Counts ({start} to {end}, from local store)")
+    print(f"Store last refreshed at: {refreshed_at}")
+    print("=" * 80)
+    rows = daily_counts(store, start, end)
+    rows['applied_date'] = rows['applied_date'].dt.strftime('%Y-%m-%d')
+    print(rows.to_string(index=False))
+
+    summary = date_range_summary(store, start, end)
+    print("\n" + "=" * 80)
+    print("SUMMARY STATISTICS")
+    print("=" * 80)
+    print(f"Total applicants: {summary['total_applicants']:,}")
+    print(f"Average daily applicants: {summary['avg_daily_applicants']:.1f}")
+    if 'highest_day' in summary:
+        print(f"Highest day: {summary['highest_day']} with {summary['highest_count']:,} applicants")
+        print(f"Lowest day: {summary['lowest_day']} with {summary['lowest_count']:,} applicants")
+    if summary['missing_days']:
+        print(f"Note: {summary['missing_days']} day(s) in range are not in the local store")
+    if summary['includes_partial_day']:
+        print("Note: range includes today, which is still partial")
+
+    print("\n" + "=" * 80)
+    print("WEEK OVER WEEK (prior week compared on the same weekdays)")
+    print("=" * 80)
+    print(week_over_week(store, weeks=int(get_arg('--weeks', 4)), as_of=end).to_string(index=False))
+
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    if '--incremental' in sys.argv or '--offline' in sys.argv:
+        incremental_main(offline='--offline' in sys.argv)
+    else:
+        main()
@@ -0,0 +1,17 @@
+-- Daily DX (Dasher) Applicant Counts for an Explicit Date Range
+-- Used by the incremental mode of query_dx_applicants.py: only the days that are
+-- missing from (or may still be restated in) the local store are queried.
+--
+-- Placeholders (filled in by applicant_store.py):
+--   {start_date} - first applied_date to count (inclusive, Pacific Time)
+--   {end_date}   - last applied_date to count (inclusive, Pacific Time)
+
+SELECT
+  CONVERT_TIMEZONE('UTC', 'America/Los_Angeles', applied_datetime)::DATE AS applied_date,
+  COUNT(DISTINCT dasher_applicant_id) AS daily_applicant_count
+FROM edw.dasher.dimension_dasher_applicants dda
+WHERE
+  CONVERT_TIMEZONE('UTC', 'America/Los_Angeles', applied_datetime)::DATE >= '{start_date}'::DATE
+  AND CONVERT_TIMEZONE('UTC', 'America/Los_Angeles', applied_datetime)::DATE <= '{end_date}'::DATE
+GROUP BY 1
+ORDER BY 1;
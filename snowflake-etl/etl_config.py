@@ -9,6 +9,11 @@ import os
 from typing import List, Dict, Optional
 
 # Steps to run (in order). Edit the SQL filenames if needed.
+# Optional per-step keys:
+#   "warehouse": warehouse name to run this step on
+#   "size": warehouse size (a key of WAREHOUSE_BY_SIZE), e.g. "XLARGE"
+# Precedence: SNOWFLAKE_WAREHOUSE_ETL env var > "warehouse" > "size" >
+# recommended size (if AUTO_WAREHOUSE_SIZING) > WAREHOUSE_OVERRIDE > SnowflakeHook default.
 ETL_STEPS: List[Dict[str, str]] = [
     {"id": "step_0", "sql": "s0_tbl_applicant_funnel_timestamp_with_backfill_snowflake.sql"},
     {"id": "step_1", "sql": "s1_tbl_major_steps_conversion_analysis_applied_L7D_cohort_snowflake.sql"},
@@ -34,6 +39,29 @@ TIMEZONE_NAME: str = "America/Los_Angeles"
 # Warehouse override for ETL runs (optional). If None, defaults from SnowflakeHook env config are used.
 WAREHOUSE_OVERRIDE: Optional[str] = None
 
+# Warehouses available to the ETL, by size. Per-step "size" settings and size
+# recommendations resolve to a warehouse name through this mapping.
+# Example: {"MEDIUM": "<medium warehouse>", "XLARGE": "<xlarge warehouse>", "4XLARGE": "DCR_WH_4XLARGE"}
+WAREHOUSE_BY_SIZE: Dict[str, str] = {}
+
+# Size recommendations (see warehouse_sizing.py) are always logged; set True to also
+# run steps without an explicit "warehouse"/"size" on the recommended size.
+AUTO_WAREHOUSE_SIZING: bool = False
+
+# Sizing heuristics: pick the smallest size expected to finish a step within
+# TARGET_STEP_SECONDS (runtime assumed to halve per size step up) and that gets at
+# least 1 XSMALL-equivalent per SCAN_GB_PER_XSMALL GB scanned.
+# Each size up doubles the credit rate, so a recommendation is at most MAX_SIZE_STEP_UP
+# sizes above the size the step last ran on; the next run shows whether it paid off.
+TARGET_STEP_SECONDS: int = 120
+SCAN_GB_PER_XSMALL: float = 8.0
+MAX_SIZE_STEP_UP: int = 1
+SIZING_HISTORY_RUNS: int = 10        # most recent successful runs per step considered
+
+# Exclusive run lock. A lock whose holder process is gone is reclaimed automatically;
+# a lock older than this is reported as possibly hung.
+LOCK_STALE_SECONDS: int = 6 * 60 * 60
+
 # Slack settings
 # Option 1: Keep empty here and set via environment variable SLACK_WEBHOOK_URL in config/.env
 # Option 2: Paste your webhook here (not recommended to commit secrets)
@@ -8,18 +8,23 @@ Features:
 - Timing and status capture per step
 - Slack notification (via incoming webhook)
 - Persisted logs and run summaries (CSV + JSON)
+- Per-step warehouse selection with size recommendations from past runs (warehouse_sizing.py)
+- Exclusive run lock, so cron-triggered and manual runs never overlap (run_lock.py)
+- Per-step progress in etl_job_status.json; entries left RUNNING by a dead run are marked ABANDONED
 
 Usage:
   python etl_runner.py
 
 Environment variables:
 - SLACK_WEBHOOK_URL: Optional. If set, a Slack message will be posted on completion
-- SNOWFLAKE_WAREHOUSE_ETL: Optional. Overrides Snowflake warehouse for this job
+- SNOWFLAKE_WAREHOUSE_ETL: Optional. Overrides Snowflake warehouse for every step of this job
+
+Exit codes: 0 success, 1 a step failed, 2 another run holds the lock.
 """
 
 import os
-import re
 import sys
+import atexit
 import json
 import time
 import csv
@@ -40,8 +45,18 @@ from etl_config import (
     ETL_STEPS,
     MAX_RETRIES,
     RETRY_WAIT_SECONDS,
-    WAREHOUSE_OVERRIDE,
     TIMEZONE_NAME,
+    LOCK_STALE_SECONDS,
+)
+from run_lock import RunLock  # noqa: E402
+from sql_parsing import parse_target_table, split_sql_statements  # noqa: E402
+from warehouse_sizing import (  # noqa: E402
+    append_step_history,
+    history_path,
+    load_step_history,
+    normalize_size,
+    recommend_sizes,
+    resolve_step_warehouse,
 )
 import pandas as pd  # noqa: E402
 
@@ -61,52 +76,15 @@ def format_duration(seconds: float) -> str:
     return f"{minutes:02d}:{secs:02d}"
 
 
-def parse_target_table(sql_text: str) -> Optional[str]:
-    """
-    Attempt to extract the table name from a CREATE OR REPLACE TABLE statement.
-    Returns the first match if found.
-    """
-    # Remove multiline comments
-    cleaned = re.sub(r"/\*.*?\*/", " ", sql_text, flags=re.DOTALL)
-    # Search for CREATE OR REPLACE TABLE <name>
-    match = re.search(r"create\s+or\s+replace\s+table\s+([^\s(]+)", cleaned, flags=re.IGNORECASE)
-    if match:
-        return match.group(1)
-    return None
-
-
-def split_sql_statements(sql_text: str) -> List[str]:
-    """
-    Split SQL into statements on semicolons, filtering out empty/comment-only chunks.
-    """
-    # Remove BOM
-    if sql_text and sql_text[0] == "\ufeff":
-        sql_text = sql_text[1:]
-
-    # Remove multiline comments first
-    no_block_comments = re.sub(r"/\*.*?\*/", " ", sql_text, flags=re.DOTALL)
-
-    # Split by semicolons
-    raw_statements = [s.strip() for s in no_block_comments.split(";")]
-
-    def is_effective(stmt: str) -> bool:
-        # Remove line comments
-        lines = []
-        for line in stmt.splitlines():
-            stripped = line.strip()
-            if stripped.startswith("--") or stripped == "":
-                continue
-            lines.append(stripped)
-        return len(" ".join(lines).strip()) > 0
-
-    statements = [s for s in raw_statements if is_effective(s)]
-    return statements
-
-
-def run_sql_job(sql_file: Path, warehouse_override: Optional[str], logger) -> Tuple[bool, Optional[str]]:
+def run_sql_job(sql_file: Path, warehouse_override: Optional[str], logger,
+                stats: Optional[Dict[str, object]] = None) -> Tuple[bool, Optional[str]]:
     """
     Execute all statements in the given SQL file using SnowflakeHook.
     Returns (success, error_message_if_any).
+
+    If `stats` is given, it is filled with execution_seconds and, from the session's
+    query history (one lookup after the last statement), bytes_scanned / warehouse /
+    warehouse_size of the statements run.
     """
     with open(sql_file, "r", encoding="utf-8") as f:
         sql_text = f.read()
@@ -119,12 +97,16 @@ def run_sql_job(sql_file: Path, warehouse_override: Optional[str], logger) -> Tu
         hook_kwargs["warehouse"] = warehouse_override
 
     snowhook = SnowflakeHook(**hook_kwargs)
+    exec_start = time.time()
 
     try:
         for idx, stmt in enumerate(statements, 1):
             preview = stmt[:100].replace("\n", " ")
             logger.info(f"[{idx}/{len(statements)}] Executing: {preview}{'...' if len(stmt) > 100 else ''}")
             snowhook.query_without_result(stmt)
+        if stats is not None:
+            stats["execution_seconds"] = round(time.time() - exec_start, 1)
+            stats.update(get_query_stats(snowhook, len(statements), logger))
         return True, None
     except Exception as exc:
         err = f"{type(exc).__name__}: {exc}"
@@ -138,6 +120,92 @@ def run_sql_job(sql_file: Path, warehouse_override: Optional[str], logger) -> Tu
             pass
 
 
+def get_query_stats(snowhook, n_statements: int, logger) -> Dict[str, object]:
+    """
+    Bytes scanned and warehouse/size of the step's statements, from this session's query history.
+
+    Each step runs on its own hook, so the session holds only the step's statements;
+    the most recent n_statements completed queries are summed in a single lookup.
+    """
+    if n_statements == 0:
+        return {}
+    query = f"""
+        select sum(bytes_scanned) as bytes_scanned,
+               max(warehouse_name) as warehouse,
+               max(warehouse_size) as warehouse_size
+        from (
+            select bytes_scanned, warehouse_name, warehouse_size
+            from table(information_schema.query_history_by_session(result_limit => 1000))
+            where execution_status = 'SUCCESS'
+            order by start_time desc
+            limit {n_statements}
+        )
+    """
+    try:
+        df = snowhook.query_snowflake(query, method="pandas")
+        df.columns = [c.lower() for c in df.columns]
+        if df.empty:
+            return {}
+        row = df.iloc[0]
+        return {
+            "bytes_scanned": int(row["bytes_scanned"]) if pd.notna(row["bytes_scanned"]) else None,
+            "warehouse": row["warehouse"],
+            "warehouse_size": normalize_size(row["warehouse_size"]),
+        }
+    except Exception as exc:
+        logger.warning(f"Could not read query history for bytes scanned: {exc}")
+        return {}
+
+
+def write_job_status(status_path: Path, status: Dict) -> None:
+    """Write etl_job_status.json atomically, so a crash mid-write never leaves it truncated."""
+    tmp_path = status_path.with_suffix(".json.tmp")
+    tmp_path.write_text(json.dumps(status, indent=2), encoding="utf-8")
+    os.replace(tmp_path, status_path)
+
+
+def update_job_status(status_path: Path, step: Dict[str, str], table_name: str, **fields) -> None:
+    """Update one step's entry in etl_job_status.json (written atomically)."""
+    status: Dict[str, Dict] = {}
+    if status_path.exists():
+        try:
+            status = json.loads(status_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            status = {}
+    entry = status.get(step["id"], {})
+    entry.update({
+        "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "job_name": step.get("name", entry.get("job_name", step["id"])),
+        "table_name": table_name,
+        "sql_file": step["sql"],
+    })
+    entry.update(fields)
+    status[step["id"]] = entry
+    write_job_status(status_path, status)
+
+
+def recover_stale_status(status_path: Path, logger) -> None:
+    """
+    Mark steps still RUNNING in etl_job_status.json as ABANDONED.
+
+    Only called while holding the run lock, so no other run can be executing them.
+    """
+    if not status_path.exists():
+        return
+    try:
+        status = json.loads(status_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return
+    stale = [step_id for step_id, entry in status.items() if entry.get("status") == "RUNNING"]
+    if not stale:
+        return
+    for step_id in stale:
+        logger.warning(f"{step_id} was left RUNNING since {status[step_id].get('last_updated')}; marking ABANDONED")
+        status[step_id]["status"] = "ABANDONED"
+        status[step_id]["error_message"] = "Runner exited before the step finished"
+    write_job_status(status_path, status)
+
+
 def send_slack_message(text: str, logger) -> bool:
     """
     Send a Slack message using an incoming webhook defined in SLACK_WEBHOOK_URL.
@@ -252,12 +320,33 @@ def main():
         load_dotenv(dotenv_path=env_path, override=False)
         logger.info(f"Loaded environment from {env_path}")
 
-    # Prefer config values, allow env overrides if present
-    warehouse_override = os.getenv("SNOWFLAKE_WAREHOUSE_ETL", WAREHOUSE_OVERRIDE or "") or None
+    # The env var overrides every step; WAREHOUSE_OVERRIDE is only the fallback (see resolve_step_warehouse)
+    warehouse_override = os.getenv("SNOWFLAKE_WAREHOUSE_ETL") or None
     retry_attempts = int(os.getenv("ETL_MAX_RETRIES", str(MAX_RETRIES)))
     retry_wait_seconds = int(os.getenv("ETL_RETRY_WAIT_SECONDS", str(RETRY_WAIT_SECONDS)))
     steps: List[Dict[str, str]] = ETL_STEPS
 
+    # Exclusive run lock: a cron run and a manual run must not overlap
+    lock = RunLock(base_dir / "etl_runner.lock", stale_after_seconds=LOCK_STALE_SECONDS)
+    if not lock.acquire():
+        logger.error(f"Another ETL run holds {lock.path.name}: {lock.describe_holder()}. Exiting.")
+        sys.exit(2)
+    atexit.register(lock.release)
+    if lock.recovered:
+        logger.warning(f"Recovered stale run lock left by pid {lock.recovered.get('pid')} "
+                       f"(started {lock.recovered.get('started_at')})")
+    status_path = base_dir / "etl_job_status.json"
+    recover_stale_status(status_path, logger)
+
+    # Warehouse size recommendations from previous runs
+    step_history_file = history_path(base_dir)
+    recommendations: Dict[str, Optional[str]] = {}
+    recs = recommend_sizes(load_step_history(step_history_file))
+    for _, rec in recs.iterrows():
+        recommendations[rec["step_id"]] = rec["recommended_size"]
+        logger.info(f"{rec['step_id']}: median {rec['median_seconds']}s, {rec['median_gb_scanned']} GB scanned "
+                    f"on {rec['observed_size']} over {rec['runs']} run(s) → recommended size {rec['recommended_size']}")
+
     results: List[Dict[str, str]] = []
     overall_success = True
 
@@ -285,15 +374,23 @@ def main():
         except Exception:
             table_name = ""
 
+        step_warehouse, warehouse_source = resolve_step_warehouse(
+            step, warehouse_override, recommendations.get(step_id))
+        logger.info(f"{step_id} warehouse: {step_warehouse or '(default)'} [{warehouse_source}]")
+
         attempt = 0
         start_time = time.time()
         last_error = None
         success = False
+        stats: Dict[str, object] = {}
 
         while True:
             attempt += 1
             logger.info(f"Executing {step_id} (attempt {attempt}) → {sql_path.name}")
-            ok, err_msg = run_sql_job(sql_path, warehouse_override, logger)
+            update_job_status(status_path, step, table_name, status="RUNNING", attempt=attempt,
+                              duration_seconds=None, error_message=None, warehouse=step_warehouse)
+            stats = {}
+            ok, err_msg = run_sql_job(sql_path, step_warehouse, logger, stats)
             if ok:
                 success = True
                 break
@@ -304,6 +401,18 @@ def main():
             time.sleep(retry_wait_seconds)
 
         duration_seconds = time.time() - start_time
+        update_job_status(status_path, step, table_name, status="SUCCESS" if success else "FAILED",
+                          attempt=attempt, duration_seconds=round(duration_seconds, 1),
+                          error_message=None if success else last_error)
+        append_step_history(step_history_file, {
+            "run_id": start_ts,
+            "step_id": step_id,
+            "status": "success" if success else "fail",
+            "warehouse": stats.get("warehouse") or step_warehouse or "",
+            "warehouse_size": stats.get("warehouse_size") or "",
+            "execution_seconds": stats.get("execution_seconds", ""),
+            "bytes_scanned": stats.get("bytes_scanned", ""),
+        })
         # Insert placeholder; last_updated_at populated after success
         result_row = {
             "query": step_id,
@@ -0,0 +1,96 @@
+"""
+Exclusive lock for ETL runs.
+
+A cron-triggered run and a manual run must never execute the steps at the same
+time: they would compete for the same warehouse and replace the same tables.
+The lock is an OS-level advisory lock (flock) on etl_runner.lock, so it is
+released by the kernel if the holder crashes or is killed. The lock file also
+records who holds it (pid, host, start time); finding that record while the
+lock is free means the previous run died without cleaning up, which is reported
+as a recovered stale lock.
+
+Usage:
+  lock = RunLock(base_dir / "etl_runner.lock")
+  if not lock.acquire():
+      print(f"Another run is in progress: {lock.describe_holder()}")
+"""
+
+import fcntl
+import json
+import os
+import socket
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class RunLock:
+    def __init__(self, path: Path, stale_after_seconds: int = 6 * 60 * 60):
+        self.path = Path(path)
+        self.stale_after_seconds = stale_after_seconds
+        self.holder: Optional[Dict] = None      # metadata of the other process, if acquire() failed
+        self.recovered: Optional[Dict] = None   # metadata left behind by a dead holder, if any
+        self._fh = None
+
+    def acquire(self) -> bool:
+        """Try to take the lock without waiting. Returns False if another live process holds it."""
+        fh = open(self.path, "a+", encoding="utf-8")
+        try:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self.holder = self._read(fh)
+            fh.close()
+            return False
+
+        previous = self._read(fh)
+        if previous:
+            self.recovered = previous
+        fh.seek(0)
+        fh.truncate()
+        json.dump({
+            "pid": os.getpid(),
+            "host": socket.gethostname(),
+            "started_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "started_ts": time.time(),
+        }, fh)
+        fh.flush()
+        os.fsync(fh.fileno())
+        self._fh = fh
+        return True
+
+    def release(self) -> None:
+        if self._fh is None:
+            return
+        # Clear the holder record first, so an empty file means a clean release
+        self._fh.seek(0)
+        self._fh.truncate()
+        self._fh.flush()
+        fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+        self._fh.close()
+        self._fh = None
+
+    def holder_age_seconds(self) -> Optional[float]:
+        if not self.holder or "started_ts" not in self.holder:
+            return None
+        return time.time() - float(self.holder["started_ts"])
+
+    def describe_holder(self) -> str:
+        if not self.holder:
+            return "unknown holder"
+        text = f"pid {self.holder.get('pid')} on {self.holder.get('host')} since {self.holder.get('started_at')}"
+        age = self.holder_age_seconds()
+        if age is not None and age > self.stale_after_seconds:
+            text += f" (held for {age / 3600:.1f}h; the run may be hung)"
+        return text
+
+    @staticmethod
+    def _read(fh) -> Optional[Dict]:
+        fh.seek(0)
+        content = fh.read().strip()
+        if not content:
+            return None
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError:
+            return {"raw": content}
@@ -3,6 +3,8 @@
 Install or update the crontab entry for the ETL based on etl_config.py.
 
 This script sets the schedule to run the ETL at the configured time in the configured timezone.
+A scheduled run that starts while another run (e.g. a manual one) is still in progress
+exits immediately with code 2: etl_runner.py holds an exclusive lock on etl_runner.lock.
 
 Usage:
   python setup_schedule.py
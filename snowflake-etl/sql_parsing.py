@@ -0,0 +1,51 @@
+"""
+SQL text helpers for the ETL runner.
+
+Kept free of Snowflake / logging imports so they can be used (and benchmarked)
+without a warehouse connection.
+"""
+
+import re
+from typing import List, Optional
+
+
+def parse_target_table(sql_text: str) -> Optional[str]:
+    """
+    Attempt to extract the table name from a CREATE OR REPLACE TABLE statement.
+    Returns the first match if found.
+    """
+    # Remove multiline comments
+    cleaned = re.sub(r"/\*.*?\*/", " ", sql_text, flags=re.DOTALL)
+    # Search for CREATE OR REPLACE TABLE <name>
+    match = re.search(r"create\s+or\s+replace\s+table\s+([^\s(]+)", cleaned, flags=re.IGNORECASE)
+    if match:
+        return match.group(1)
+    return None
+
+
+def split_sql_statements(sql_text: str) -> List[str]:
+    """
+    Split SQL into statements on semicolons, filtering out empty/comment-only chunks.
+    """
+    # Remove BOM
+    if sql_text and sql_text[0] == "\ufeff":
+        sql_text = sql_text[1:]
+
+    # Remove multiline comments first
+    no_block_comments = re.sub(r"/\*.*?\*/", " ", sql_text, flags=re.DOTALL)
+
+    # Split by semicolons
+    raw_statements = [s.strip() for s in no_block_comments.split(";")]
+
+    def is_effective(stmt: str) -> bool:
+        # Remove line comments
+        lines = []
+        for line in stmt.splitlines():
+            stripped = line.strip()
+            if stripped.startswith("--") or stripped == "":
+                continue
+            lines.append(stripped)
+        return len(" ".join(lines).strip()) > 0
+
+    statements = [s for s in raw_statements if is_effective(s)]
+    return statements
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Per-step warehouse selection and size recommendations for the ETL.
+
+etl_runner.py appends one row per executed step to outputs/step_history.csv
+(execution time, bytes scanned and the warehouse size reported by Snowflake's
+query history). From the most recent successful runs of each step this module
+recommends the smallest warehouse size that:
+
+- is expected to finish within TARGET_STEP_SECONDS, assuming runtime halves with
+  each size step up (runs on different sizes are normalized to XSMALL-seconds), and
+- gets at least one XSMALL-equivalent per SCAN_GB_PER_XSMALL GB scanned,
+
+capped at MAX_SIZE_STEP_UP sizes above the size the step last ran on. Each size
+up doubles the credit rate, so a slow step grows one size per run and the next
+run's history confirms whether the extra size actually paid off.
+
+Usage:
+  python warehouse_sizing.py        # print the recommendation per step
+"""
+
+import csv
+import math
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from etl_config import (
+    ETL_STEPS,
+    WAREHOUSE_BY_SIZE,
+    WAREHOUSE_OVERRIDE,
+    AUTO_WAREHOUSE_SIZING,
+    TARGET_STEP_SECONDS,
+    SCAN_GB_PER_XSMALL,
+    SIZING_HISTORY_RUNS,
+    MAX_SIZE_STEP_UP,
+)
+
+# Snowflake warehouse sizes, smallest first; each step up doubles compute
+SIZE_TIERS: List[str] = ["XSMALL", "SMALL", "MEDIUM", "LARGE", "XLARGE", "2XLARGE", "3XLARGE", "4XLARGE"]
+
+HISTORY_COLUMNS = ["run_id", "step_id", "status", "warehouse", "warehouse_size", "execution_seconds", "bytes_scanned"]
+
+
+def normalize_size(size: Optional[str]) -> Optional[str]:
+    """'X-Small' / 'x-small' / 'XSMALL' -> 'XSMALL'; None if not a known size."""
+    if not size or not isinstance(size, str):
+        return None
+    key = size.upper().replace("-", "").replace(" ", "").replace("_", "")
+    return key if key in SIZE_TIERS else None
+
+
+def history_path(base_dir: Path) -> Path:
+    return base_dir / "outputs" / "step_history.csv"
+
+
+def append_step_history(path: Path, row: Dict[str, object]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    is_new = not path.exists()
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=HISTORY_COLUMNS, extrasaction="ignore")
+        if is_new:
+            writer.writeheader()
+        writer.writerow(row)
+
+
+def load_step_history(path: Path) -> pd.DataFrame:
+    if not path.exists():
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+    return pd.read_csv(path)
+
+
+def _tier_for(ratio: float) -> int:
+    """Smallest tier t with ratio <= 2**t, clipped to the available tiers."""
+    if not ratio or ratio <= 1:
+        return 0
+    return min(int(math.ceil(math.log2(ratio))), len(SIZE_TIERS) - 1)
+
+
+def recommend_sizes(history: pd.DataFrame, target_seconds: float = TARGET_STEP_SECONDS,
+                    gb_per_xsmall: float = SCAN_GB_PER_XSMALL,
+                    last_n: int = SIZING_HISTORY_RUNS,
+                    max_step_up: int = MAX_SIZE_STEP_UP) -> pd.DataFrame:
+    """
+    One row per step with the medians used and the recommended size (None without history).
+
+    `uncapped_size` is what the heuristics alone ask for; `recommended_size` is at
+    most max_step_up sizes above the last observed size.
+    """
+    rows: List[Dict[str, object]] = []
+    ok = history[history["status"] == "success"]
+    for step_id, runs in ok.groupby("step_id", sort=False):
+        runs = runs.tail(last_n)
+        tiers = runs["warehouse_size"].map(normalize_size).map(
+            lambda s: SIZE_TIERS.index(s) if s else None)
+        seconds = pd.to_numeric(runs["execution_seconds"], errors="coerce")
+        gb = pd.to_numeric(runs["bytes_scanned"], errors="coerce") / 1e9
+
+        candidates: List[int] = []
+        # Normalize each run to XSMALL-seconds, so runs on different sizes are comparable
+        known = tiers.notna() & seconds.notna()
+        duration_tier = None
+        if known.any():
+            xsmall_seconds = (seconds[known] * 2.0 ** tiers[known].astype(float)).median()
+            duration_tier = _tier_for(xsmall_seconds / target_seconds)
+            candidates.append(duration_tier)
+        scan_tier = None
+        if gb.notna().any():
+            scan_tier = _tier_for(gb.median() / gb_per_xsmall)
+            candidates.append(scan_tier)
+
+        observed = tiers.dropna()
+        uncapped = max(candidates) if candidates else None
+        recommended = uncapped
+        if uncapped is not None and len(observed):
+            recommended = min(uncapped, int(observed.iloc[-1]) + max_step_up)
+        rows.append({
+            "step_id": step_id,
+            "runs": len(runs),
+            "median_seconds": round(float(seconds.median()), 1) if seconds.notna().any() else None,
+            "median_gb_scanned": round(float(gb.median()), 2) if gb.notna().any() else None,
+            "observed_size": SIZE_TIERS[int(observed.iloc[-1])] if len(observed) else None,
+            "size_for_duration": SIZE_TIERS[duration_tier] if duration_tier is not None else None,
+            "size_for_scan": SIZE_TIERS[scan_tier] if scan_tier is not None else None,
+            "uncapped_size": SIZE_TIERS[uncapped] if uncapped is not None else None,
+            "recommended_size": SIZE_TIERS[recommended] if recommended is not None else None,
+        })
+    return pd.DataFrame(rows)
+
+
+def warehouse_for_size(size: Optional[str], by_size: Dict[str, str] = WAREHOUSE_BY_SIZE) -> Optional[str]:
+    """
+    Warehouse for `size`: the exact size if configured, else the smallest larger
+    configured size, else the largest configured one. None if nothing is configured.
+    """
+    size = normalize_size(size)
+    available = sorted((SIZE_TIERS.index(s), name) for s, name in
+                       ((normalize_size(k), v) for k, v in by_size.items()) if s and name)
+    if not size or not available:
+        return None
+    wanted = SIZE_TIERS.index(size)
+    for tier, name in available:
+        if tier >= wanted:
+            return name
+    return available[-1][1]
+
+
+def resolve_step_warehouse(step: Dict[str, str], env_override: Optional[str],
+                           recommended_size: Optional[str] = None,
+                           auto_sizing: bool = AUTO_WAREHOUSE_SIZING,
+                           by_size: Dict[str, str] = WAREHOUSE_BY_SIZE,
+                           default: Optional[str] = WAREHOUSE_OVERRIDE) -> Tuple[Optional[str], str]:
+    """(warehouse or None for the hook default, where the choice came from)."""
+    if env_override:
+        return env_override, "SNOWFLAKE_WAREHOUSE_ETL"
+    if step.get("warehouse"):
+        return step["warehouse"], "step warehouse"
+    if step.get("size"):
+        warehouse = warehouse_for_size(step["size"], by_size)
+        if warehouse:
+            return warehouse, f"step size {normalize_size(step['size'])}"
+    if auto_sizing and recommended_size:
+        warehouse = warehouse_for_size(recommended_size, by_size)
+        if warehouse:
+            return warehouse, f"recommended size {recommended_size}"
+    if default:
+        return default, "WAREHOUSE_OVERRIDE"
+    return None, "SnowflakeHook default"
+
+
+def main():
+    base_dir = Path(__file__).resolve().parent
+    history = load_step_history(history_path(base_dir))
+    if history.empty:
+        print(f"No step history yet at {history_path(base_dir)}; run etl_runner.py first.")
+        return
+    recs = recommend_sizes(history)
+    # Warehouse each step would run on with AUTO_WAREHOUSE_SIZING enabled
+    steps = {step["id"]: step for step in ETL_STEPS}
+    recs["warehouse_if_auto"] = [
+        resolve_step_warehouse(steps.get(step_id, {"id": step_id}), None, size, auto_sizing=True)[0]
+        for step_id, size in zip(recs["step_id"], recs["recommended_size"])
+    ]
+    print(recs.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()